@@ -2,5 +2,12 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Статика с отпечатками в именах + предсжатые .gz/.br (см. STORAGES в settings)
 python manage.py collectstatic --noinput
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Статический экспорт публичных страниц (раздаётся при STATIC_EXPORT=True)
+python manage.py export_static
+
+# Размеры страниц и статики в лог сборки (ошибка отчёта не ломает деплой)
+python manage.py static_report || true
@@ -0,0 +1,17 @@
+# Конфигурация gunicorn (Procfile и render.yaml передают её через -c)
+
+# Приложение импортируется один раз в master-процессе до fork: воркеры
+# получают готовые модули, URLconf и шаблоны, а не грузят их каждый сам
+# после простоя на бесплатном плане Render.
+preload_app = True
+
+
+def when_ready(server):
+    from team.warmup import warm_up
+    warm_up(connect=False)
+
+
+def post_fork(server, worker):
+    # Соединение с БД и активный сезон — уже в воркере, до первого запроса
+    from team.warmup import warm_up
+    warm_up()
@@ -54,27 +54,41 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'team.middleware.CompressionMiddleware',
+    'team.middleware.ReplicaMiddleware',
+    'team.middleware.MatchdayMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'team.middleware.ProfilingMiddleware',
+    'team.middleware.ExportedPageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'iskra.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # В продакшене шаблоны компилируются один раз на процесс;
+            # при DEBUG читаются с диска, чтобы правки были видны сразу
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
@@ -120,6 +134,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Блобы моложе стольких минут не удаляются: загрузка с тем же содержимым могла ещё не попасть в БД
+MEDIA_GC_GRACE_MINUTES = config('MEDIA_GC_GRACE_MINUTES', default=60, cast=int)
 
 CACHES = {
     'default': {
@@ -134,17 +150,130 @@ CACHES = {
 # Время кэширования в секундах
 CACHE_TTL = 60 * 15  # 15 минут
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Сколько прокси перед приложением дописывают X-Forwarded-For (на Render — один).
+# Адрес клиента для лимитов — N-й справа; 0 — заголовок не учитывается, только REMOTE_ADDR
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=1, cast=int)
+
+# Ограничение частоты (на IP): 'запросов/период', период — s, m, h или d
+RATELIMITS = {
+    'comment': config('RATELIMIT_COMMENT', default='5/m'),
+    'join': config('RATELIMIT_JOIN', default='3/h'),
+    'api': config('RATELIMIT_API', default='120/m'),
+    'profile': config('RATELIMIT_PROFILE', default='10/m'),
+}
+
+# Профилирование отдельных запросов сотрудниками (team/profiling.py, /admin/profiles/)
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=True, cast=bool)
+PROFILE_TOKEN_MAX_AGE = config('PROFILE_TOKEN_MAX_AGE', default=60 * 60, cast=int)
+PROFILE_TTL = config('PROFILE_TTL', default=24 * 60 * 60, cast=int)
+
+# Заявки в команду (team/applications.py). Повтор заявки с тем же телефоном или
+# email в пределах окна не создаёт новую запись; тренерам уходит сводка
+# по расписанию (manage.py send_application_digest), а не письмо на каждую заявку.
+COACH_EMAILS = config('COACH_EMAILS', default='coach@iskra-volleyball.ru').split(',')
+# SMTP для сводки (по умолчанию — как у Django: localhost:25)
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
+APPLICATION_DEDUP_HOURS = config('APPLICATION_DEDUP_HOURS', default=72, cast=int)
+# Заявок в одном письме сводки
+APPLICATION_DIGEST_SIZE = config('APPLICATION_DIGEST_SIZE', default=50, cast=int)
+
+# Режим матча (manage.py matchday по cron, team/matchday.py): за LEAD минут до
+# начала матча кэш прогревается и живёт до date + DURATION, а разделы из
+# MATCHDAY_DEGRADED_PATHS отдаются из снимков страниц до конца режима.
+MATCHDAY_LEAD_MINUTES = config('MATCHDAY_LEAD_MINUTES', default=120, cast=int)
+MATCHDAY_DURATION_MINUTES = config('MATCHDAY_DURATION_MINUTES', default=180, cast=int)
+MATCHDAY_DEGRADED_PATHS = ['/api/albums/', '/gallery/']
+
+# Ответы короче этого размера (байт) не сжимаются — выигрыш меньше накладных расходов
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'team.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': ['team.throttling.SlidingWindowThrottle'],
+}
+
+# collectstatic добавляет в имена файлов хэш содержимого (site.3f2a….css) и кладёт
+# рядом сжатые .gz и .br (brotli — при установленном пакете Brotli), а WhiteNoise
+# отдаёт их с Cache-Control: immutable. STATICFILES_STORAGE в Django 5 не действует.
+STORAGES = {
+    # Загрузки хранятся один раз под sha256 содержимого (team/storage.py)
+    'default': {
+        'BACKEND': 'team.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # База данных
+# DB_POOL выбирает, кто держит соединения с Postgres:
+#   persistent — одно постоянное соединение на воркер (CONN_MAX_AGE), как раньше;
+#   pool       — пул psycopg 3 внутри воркера (OPTIONS['pool'], Django 5.1+);
+#   pgbouncer  — соединения держит PgBouncer в режиме transaction, поэтому
+#                серверные курсоры отключены.
+# Во всех режимах переиспользуемое соединение проверяется перед запросом
+# (CONN_HEALTH_CHECKS): после простоя Render первый запрос не падает на мёртвом сокете.
+DB_POOL = config('DB_POOL', default='persistent')
+
 DATABASES = {
     'default': dj_database_url.config(
         default=config('DATABASE_URL'),
-        conn_max_age=600
+        # Пул несовместим с постоянными соединениями Django — им управляет сам пул
+        conn_max_age=0 if DB_POOL == 'pool' else config('DB_CONN_MAX_AGE', default=600, cast=int),
+        conn_health_checks=True,
+        disable_server_side_cursors=DB_POOL == 'pgbouncer',
     )
 }
 
+if DB_POOL == 'pool' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        # Соединение, простоявшее дольше, пул закрывает сам (Render рвёт простаивающие)
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=int),
+        # Проверку соединения при выдаче из пула Django включает сам по CONN_HEALTH_CHECKS
+    }
+
+# Реплика для чтения (необязательно): публичные GET-запросы читают с неё,
+# админка и формы пишут и читают основную базу (team/routers.py)
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+# Сколько секунд после POST клиент читает с основной базы (реплика может отставать)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=True,
+        disable_server_side_cursors=DB_POOL == 'pgbouncer',
+    )
+    if 'pool' in DATABASES['default'].get('OPTIONS', {}):
+        DATABASES['replica'].setdefault('OPTIONS', {})['pool'] = dict(DATABASES['default']['OPTIONS']['pool'])
+    # В тестах реплика — та же тестовая база
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['team.routers.ReplicaRouter']
+
 # Статические файлы
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Версия выкладки (Render задаёт коммит сам): входит в ETag страниц, чтобы после деплоя
+# браузер не получил 304 на HTML со ссылками на удалённые файлы статики
+RELEASE = config('RENDER_GIT_COMMIT', default='')
+
+# Статический экспорт публичных страниц (manage.py export_static, team/export.py).
+# STATIC_EXPORT включает раздачу файлов и их перерисовку по сигналам при сохранении.
+STATIC_EXPORT = config('STATIC_EXPORT', default=False, cast=bool)
+STATIC_EXPORT_ROOT = config('STATIC_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'export'))
+# Host для рендера страниц экспорта (должен проходить ALLOWED_HOSTS)
+STATIC_EXPORT_HOST = config('STATIC_EXPORT_HOST', default=ALLOWED_HOSTS[0].lstrip('.'))
 
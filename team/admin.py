@@ -1,28 +1,87 @@
-from django.contrib import admin
-from .models import Player, Match, News, Album, Photo, Season, Opponent, PlayerMatchStat, NewsComment, LeagueStanding
+from urllib.parse import urlencode
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
+from django.http import Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+
+from .models import (
+    Player, Match, News, Album, Photo, Season, Opponent, PlayerMatchStat, NewsComment, LeagueStanding, LeagueFixture,
+    MatchSet, PlayerApplication,
+)
+
+
+# Списки в админке не считают COUNT(*) всей таблицы при каждом поиске или фильтре
+# (show_full_result_count), FK-колонки читаются одним JOIN (list_select_related),
+# а выбор матча/игрока/новости идёт через поиск (autocomplete_fields), а не
+# выпадающим списком из всех строк таблицы.
 
 
 # === Игроки и матчи (оставляем) ===
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
-    list_display = ('name', 'number', 'position')
-    list_filter = ('position',)
+    list_display = ('name', 'number', 'position', 'is_active')
+    list_filter = ('is_active', 'position')
     search_fields = ('name',)
+    show_full_result_count = False
+
+
+class MatchSetInline(admin.TabularInline):
+    model = MatchSet
+    extra = 0
+    max_num = 5
 
 
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
     list_display = ('opponent', 'date', 'location', 'result', 'points')
     list_filter = ('season', 'is_home')
+    list_select_related = ('opponent',)
     ordering = ('date',)
+    search_fields = ('opponent__name', 'location')
+    autocomplete_fields = ('season', 'opponent')
+    show_full_result_count = False
+    inlines = [MatchSetInline]
+
+    def get_queryset(self, request):
+        # Автодополнение матчей в статистике тоже строит __str__ с соперником
+        return super().get_queryset(request).select_related('opponent').with_outcome()
+
+    @admin.display(description='Счёт', ordering='sets_home')
+    def result(self, obj):
+        return obj.outcome_result
+
+    def save_related(self, request, form, formsets, change):
+        from .standings import sync_match_fixture
+
+        super().save_related(request, form, formsets, change)
+        # Если партии заполнены, счёт по сетам и мячи берутся из них
+        match = form.instance
+        saved = (match.sets_home, match.sets_away, match.balls_home, match.balls_away)
+        match.apply_sets(list(match.sets.all()))
+        if (match.sets_home, match.sets_away, match.balls_home, match.balls_away) == saved:
+            return
+        match.points = Match.calculate_points(match.sets_home, match.sets_away)
+        # update(), а не второй save(): сигналы матча уже отправлены в save_model,
+        # заново нужен только счёт в календаре лиги (и по нему — таблица)
+        Match.objects.filter(pk=match.pk).update(
+            sets_home=match.sets_home, sets_away=match.sets_away,
+            balls_home=match.balls_home, balls_away=match.balls_away, points=match.points,
+        )
+        sync_match_fixture(match)
 
 
 # === НОВОСТИ ===
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    list_display = ('title', 'created_at')
+    list_display = ('title', 'created_at', 'approved_comments_count')
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = ('created_at',)
+    search_fields = ('title',)
+    show_full_result_count = False
 
 
 # === АЛЬБОМЫ и ФОТО ===
@@ -36,23 +95,55 @@ class AlbumAdmin(admin.ModelAdmin):
     inlines = [PhotoInline]
     list_display = ('title', 'created_at', 'photo_count')
     readonly_fields = ('created_at',)
+    show_full_result_count = False
 
-    def photo_count(self, obj):
-        return obj.photos.count()
+    def get_queryset(self, request):
+        # Число фото — одним GROUP BY, а не COUNT на каждую строку списка
+        return super().get_queryset(request).annotate(photos_total=Count('photos'))
 
-    photo_count.short_description = 'Фото'
+    @admin.display(description='Фото', ordering='photos_total')
+    def photo_count(self, obj):
+        return obj.photos_total
 
 
 # === СЕЗОНЫ ===
 @admin.register(Season)
 class SeasonAdmin(admin.ModelAdmin):
-    list_display = ('name', 'is_active')
+    list_display = ('name', 'is_active', 'standings_from_fixtures')
+    search_fields = ('name',)
+    show_full_result_count = False
+    actions = ['archive', 'recompute_standings']
+
+    @admin.action(description='Заархивировать завершённые сезоны')
+    def archive(self, request, queryset):
+        from .seasons import archive_season
+        for season in queryset:
+            try:
+                archive_season(season)
+            except ValueError as exc:
+                self.message_user(request, str(exc), messages.WARNING)
+            else:
+                self.message_user(request, f'Сезон «{season}» заархивирован')
+
+    @admin.action(description='Пересчитать турнирную таблицу по календарю лиги')
+    def recompute_standings(self, request, queryset):
+        from .standings import rebuild_season
+        for season in queryset:
+            if rebuild_season(season):
+                self.message_user(request, f'Таблица сезона «{season}» пересчитана')
+            else:
+                self.message_user(
+                    request, f'Сезон «{season}»: таблица ведётся вручную — включите «Таблица по календарю лиги»',
+                    messages.WARNING,
+                )
 
 
 # === СОПЕРНИКИ ===
 @admin.register(Opponent)
 class OpponentAdmin(admin.ModelAdmin):
     list_display = ('name',)
+    search_fields = ('name',)
+    show_full_result_count = False
 
 
 # === СТАТИСТИКА ===
@@ -60,18 +151,138 @@ class OpponentAdmin(admin.ModelAdmin):
 class PlayerMatchStatAdmin(admin.ModelAdmin):
     list_display = ('player', 'match', 'points', 'aces', 'blocks')
     list_filter = ('match__season', 'player')
+    list_select_related = ('player', 'match__opponent')
+    search_fields = ('player__name', 'match__opponent__name')
+    autocomplete_fields = ('player', 'match')
+    show_full_result_count = False
 
 
 @admin.register(NewsComment)
 class NewsCommentAdmin(admin.ModelAdmin):
     list_display = ('author_name', 'news', 'created_at', 'is_approved')
+    list_select_related = ('news',)  # __str__ и колонка news без запроса на строку
     list_filter = ('is_approved', 'created_at')
     list_editable = ('is_approved',)
     search_fields = ('author_name', 'content')
+    autocomplete_fields = ('news',)
+    show_full_result_count = False
 
 
 @admin.register(LeagueStanding)
 class LeagueStandingAdmin(admin.ModelAdmin):
-    list_display = ('position', 'team_name', 'played', 'wins', 'losses', 'sets_won', 'sets_lost', 'points', 'season')
+    list_display = (
+        'position', 'team_name', 'played', 'wins', 'losses', 'sets_won', 'sets_lost', 'balls_won', 'balls_lost',
+        'points', 'season',
+    )
     list_filter = ('season',)
+    list_select_related = ('season',)
     ordering = ('season', 'position')
+    show_full_result_count = False
+
+
+@admin.register(LeagueFixture)
+class LeagueFixtureAdmin(admin.ModelAdmin):
+    list_display = ('date', 'home_team', 'away_team', 'sets_home', 'sets_away', 'balls_home', 'balls_away', 'season')
+    list_filter = ('season',)
+    list_select_related = ('season',)
+    search_fields = ('home_team', 'away_team')
+    ordering = ('-date',)
+    show_full_result_count = False
+
+    def has_change_permission(self, request, obj=None):
+        # Наши матчи правятся через «Матчи» и синхронизируются сами
+        if obj is not None and obj.match_id:
+            return False
+        return super().has_change_permission(request, obj)
+
+
+# === ЗАЯВКИ В КОМАНДУ ===
+@admin.register(PlayerApplication)
+class PlayerApplicationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'age', 'position', 'phone', 'email', 'submitted_at', 'repeats', 'notified_at')
+    list_filter = (('notified_at', admin.EmptyFieldListFilter), 'position')
+    search_fields = ('name', 'phone', 'email')
+    readonly_fields = ('submitted_at', 'repeats', 'notified_at')
+    ordering = ('-submitted_at',)
+    show_full_result_count = False
+
+    def get_urls(self):
+        digest = path(
+            'digest/', self.admin_site.admin_view(self.digest_view), name='team_playerapplication_digest',
+        )
+        return [digest, *super().get_urls()]
+
+    def digest_view(self, request):
+        """Очередь заявок, ещё не отправленных тренерам, и предпросмотр писем сводки"""
+        from .applications import digest_messages, pending_applications, send_digest
+
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        if request.method == 'POST':
+            if not self.has_change_permission(request):
+                raise PermissionDenied
+            try:
+                applications, sent = send_digest()
+            except Exception as exc:
+                self.message_user(request, f'Сводка не отправлена: {exc}', messages.ERROR)
+            else:
+                self.message_user(request, f'Отправлено заявок: {applications}, писем: {sent}')
+            return redirect('admin:team_playerapplication_digest')
+
+        pending = list(pending_applications())
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Очередь сводки тренерам',
+            'pending': pending,
+            'digest': digest_messages(pending),
+            'can_send': self.has_change_permission(request),
+        }
+        return TemplateResponse(request, 'admin/team/playerapplication/digest_queue.html', context)
+
+
+# === ПРОФИЛИ ЗАПРОСОВ ===
+# Модели у отчётов нет (они живут в кэше), поэтому страницы добавляются
+# в URL самого admin.site — так же, как get_urls() у ModelAdmin.
+def profile_reports_view(request):
+    from .profiling import PROFILE_PARAM, make_token, recent_reports
+
+    token = make_token(request.user)
+    album = Album.objects.only('id').first()
+    examples = [reverse('our_results')] + ([reverse('album_detail', args=[album.id])] if album else [])
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'reports': recent_reports(),
+        'token': token,
+        'param': PROFILE_PARAM,
+        'examples': [f'{url}?{urlencode({PROFILE_PARAM: token})}' for url in examples],
+    }
+    return TemplateResponse(request, 'admin/team/profiles/list.html', context)
+
+
+def profile_report_view(request, report_id):
+    from .profiling import get_report
+
+    report = get_report(report_id)
+    if report is None:
+        raise Http404('Отчёт не найден или устарел')
+    context = {
+        **admin.site.each_context(request),
+        'title': f'Профиль {report["method"]} {report["path"]}',
+        'report': report,
+    }
+    return TemplateResponse(request, 'admin/team/profiles/detail.html', context)
+
+
+def _get_urls_with_profiles(get_urls):
+    def wrapper():
+        return [
+            path('profiles/', admin.site.admin_view(profile_reports_view), name='profile_reports'),
+            path('profiles/<str:report_id>/', admin.site.admin_view(profile_report_view), name='profile_report'),
+            *get_urls(),
+        ]
+    return wrapper
+
+
+admin.site.get_urls = _get_urls_with_profiles(admin.site.get_urls)
@@ -0,0 +1,134 @@
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, When, Window
+from django.db.models.functions import RowNumber, TruncMonth
+
+from .caching import get_or_compute
+from .models import Match, Season
+
+
+# ===== АГРЕГАТЫ ПО МАТЧАМ =====
+# Всё считается в SQL (GROUP BY и оконные функции); в Python остаются
+# только деления над уже сгруппированными строками.
+
+WON = Q(sets_home__gt=F('sets_away'))
+
+OUTCOME_AGGREGATES = {
+    'played': Count('id'),
+    'wins': Count('id', filter=WON),
+    'sets_won': Sum('sets_home'),
+    'sets_lost': Sum('sets_away'),
+    'points': Sum('outcome_points'),
+}
+
+
+def played_matches():
+    """Сыгранные матчи (счёт не 0:0) с очками и победой, посчитанными в SQL"""
+    return Match.objects.with_outcome().filter(Q(sets_home__gt=0) | Q(sets_away__gt=0))
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 3) if denominator else None
+
+
+def with_rates(row):
+    """Дополняет строку агрегатов долями: победы, соотношение сетов, очки за матч"""
+    for key in OUTCOME_AGGREGATES:
+        row[key] = row.get(key) or 0
+    row['losses'] = row['played'] - row['wins']
+    row['win_rate'] = _ratio(row['wins'], row['played'])
+    row['set_ratio'] = _ratio(row['sets_won'], row['sets_lost'])
+    row['points_per_match'] = _ratio(row['points'], row['played'])
+    return row
+
+
+def outcome_totals(matches):
+    return with_rates(matches.aggregate(**OUTCOME_AGGREGATES))
+
+
+# ===== ЛИЧНЫЕ ВСТРЕЧИ =====
+def head_to_head(opponent):
+    """История встреч с соперником по всем сезонам (кэш до изменения результатов)"""
+    return get_or_compute('results', f'h2h:{opponent.id}', lambda: _head_to_head(opponent))
+
+
+def _head_to_head(opponent):
+    matches = played_matches().filter(opponent=opponent)
+
+    by_season = [
+        with_rates(row)
+        for row in matches.values('season_id', 'season__name').annotate(**OUTCOME_AGGREGATES).order_by('season_id')
+    ]
+
+    # Нарастающий итог побед по ходу истории — оконными функциями
+    order = [F('date').asc(), F('id').asc()]
+    history = matches.annotate(
+        running_played=Window(RowNumber(), order_by=order),
+        running_wins=Window(
+            Sum(Case(When(WON, then=1), default=0, output_field=IntegerField())), order_by=order,
+        ),
+    ).values(
+        'id', 'date', 'season__name', 'is_home', 'sets_home', 'sets_away',
+        'outcome_points', 'outcome_is_win', 'running_played', 'running_wins',
+    ).order_by(*order)
+
+    return {
+        'opponent': {'id': opponent.id, 'name': opponent.name},
+        'totals': outcome_totals(matches),
+        'seasons': [
+            {'season': {'id': row.pop('season_id'), 'name': row.pop('season__name')}, **row} for row in by_season
+        ],
+        'matches': [
+            {
+                'id': row['id'],
+                'date': row['date'].isoformat(),
+                'season': row['season__name'],
+                'is_home': row['is_home'],
+                'result': f"{row['sets_home']}:{row['sets_away']}",
+                'is_win': row['outcome_is_win'],
+                'points': row['outcome_points'],
+                'running_win_rate': _ratio(row['running_wins'], row['running_played']),
+            }
+            for row in history
+        ],
+    }
+
+
+# ===== ДИНАМИКА =====
+def season_trends(season):
+    """Помесячная динамика сезона (кэш до изменения матчей этого сезона)"""
+    return get_or_compute(f'season:{season.id}', 'trends', lambda: _season_trends(season))
+
+
+def _season_trends(season):
+    matches = played_matches().filter(season=season)
+    months = matches.annotate(month=TruncMonth('date')).values('month').annotate(
+        **OUTCOME_AGGREGATES
+    ).order_by('month')
+    return {
+        'season': {'id': season.id, 'name': season.name},
+        'totals': outcome_totals(matches),
+        'months': [
+            {'month': row.pop('month').strftime('%Y-%m'), **with_rates(row)} for row in months
+        ],
+    }
+
+
+def seasons_trends():
+    """Сезон к сезону: доля побед, соотношение сетов, очки за матч и их изменение"""
+    return get_or_compute('results', 'trends', _seasons_trends)
+
+
+def _seasons_trends():
+    rows = played_matches().values('season_id').annotate(**OUTCOME_AGGREGATES).order_by('season_id')
+    names = dict(Season.objects.values_list('id', 'name'))
+    seasons = []
+    previous = None
+    for row in rows:
+        row = with_rates(row)
+        season_id = row.pop('season_id')
+        if previous:
+            for key in ('win_rate', 'set_ratio', 'points_per_match'):
+                if row[key] is not None and previous[key] is not None:
+                    row[f'{key}_change'] = round(row[key] - previous[key], 3)
+        seasons.append({'season': {'id': season_id, 'name': names.get(season_id)}, **row})
+        previous = row
+    return {'seasons': seasons}
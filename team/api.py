@@ -1,30 +1,111 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from .models import Player, Match, News, Album, Season
-from .serializers import *
+from django.db.models import F
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition
+from .analytics import head_to_head, season_trends, seasons_trends
+from .models import Player, Match, News, Album, Season, Opponent
+from .pagination import COMMENTS_PER_PAGE, PHOTOS_PER_PAGE, keyset_page
+from .renderers import StreamingJSONRenderer
+from .roster import get_roster, roster_etag
+from .seasons import get_season_json
+from .serializers import (
+    AlbumSerializer, MatchDetailSerializer, MatchSerializer, NewsCommentSerializer, NewsSerializer, PhotoGridSerializer,
+    PlayerSerializer, SeasonSerializer,
+)
 
 
-class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Player.objects.all()
+class StreamingListMixin:
+    """list() в JSON отдаётся потоком: память воркера не растёт с размером ответа"""
+
+    stream_chunk_size = 200
+
+    def list(self, request, *args, **kwargs):
+        # Браузерный API (HTML) и пагинированные ответы — как обычно
+        if not isinstance(request.accepted_renderer, JSONRenderer) or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = StreamingJSONRenderer()
+        return StreamingHttpResponse(
+            renderer.render_stream(self.stream_items(queryset)),
+            content_type=renderer.media_type,
+        )
+
+    def stream_items(self, queryset):
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            yield serializer_class(obj, context=context).data
+
+
+class PlayerViewSet(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Player.objects.filter(is_active=True)
     serializer_class = PlayerSerializer
     permission_classes = [permissions.AllowAny]
 
+    def stream_items(self, queryset):
+        """Быстрый путь списка: values() вместо экземпляра сериализатора на строку"""
+        positions = dict(Player.POSITION_CHOICES)
+        storage = Player._meta.get_field('photo').storage
+        fields = PlayerSerializer.Meta.fields
+        for row in queryset.values('id', 'name', 'number', 'position', 'photo', 'bio').iterator():
+            row['position_display'] = positions.get(row['position'], row['position'])
+            # Как ImageField DRF: абсолютный URL файла или None
+            if row['photo']:
+                row['photo'] = self.request.build_absolute_uri(storage.url(row['photo']))
+            else:
+                row['photo'] = None
+            yield {name: row[name] for name in fields}
+
 
-class MatchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Match.objects.all()
+class MatchViewSet(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Match.objects.select_related('opponent', 'season')
     serializer_class = MatchSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            return super().get_queryset().prefetch_related('sets')
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return MatchDetailSerializer
+        return super().get_serializer_class()
+
+    def stream_items(self, queryset):
+        """Быстрый путь списка: result/is_win/points считаются в SQL, строки — словари"""
+        # Как DateTimeField DRF (ISO 8601 в текущем часовом поясе), но пояс берём один раз на список
+        tz = timezone.get_current_timezone()
+        fields = MatchSerializer.Meta.fields
+        rows = queryset.with_outcome().values(
+            'id', 'opponent', 'season', 'date', 'location', 'is_home', 'sets_home', 'sets_away',
+            'outcome_result', 'outcome_is_win', 'outcome_points',
+            opponent_name=F('opponent__name'), season_name=F('season__name'),
+        )
+        for row in rows.iterator():
+            date = row['date'].astimezone(tz).isoformat()
+            row['date'] = date[:-6] + 'Z' if date.endswith('+00:00') else date
+            row['result'] = row.pop('outcome_result')
+            row['is_win'] = row.pop('outcome_is_win')
+            row['points'] = row.pop('outcome_points')
+            yield {name: row[name] for name in fields}
+
 
-class NewsViewSet(viewsets.ReadOnlyModelViewSet):
+class NewsViewSet(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = News.objects.all()
     serializer_class = NewsSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class AlbumViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Album.objects.all()
+class AlbumViewSet(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
+    # photos.count у предзагруженного набора считается без запроса
+    queryset = Album.objects.prefetch_related('photos')
     serializer_class = AlbumSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -35,18 +116,100 @@ def api_home(request):
         'message': 'Добро пожаловать в API ВК «ИСКРА»',
         'endpoints': {
             'players': '/api/players/',
+            'roster': '/api/players/roster/',
+            'player_by_number': '/api/players/by-number/{number}/',
             'matches': '/api/matches/',
             'news': '/api/news/',
             'albums': '/api/albums/',
             'current_season': '/api/current-season/',
+            'season': '/api/seasons/{id}/',
+            'season_trends': '/api/seasons/{id}/trends/',
+            'trends': '/api/trends/',
+            'head_to_head': '/api/opponents/{id}/head-to-head/',
+            'album_photos': '/api/albums/{id}/photos/',
         }
     })
 
 
 @api_view(['GET'])
 def current_season(request):
-    season = Season.objects.filter(is_active=True).first()
+    season = Season.get_active()
     if season:
         serializer = SeasonSerializer(season)
         return Response(serializer.data)
     return Response({'error': 'Активный сезон не найден'})
+
+
+@api_view(['GET'])
+def news_comments(request, slug):
+    """Одобренные комментарии новости порциями по keyset-курсору (?after=...)"""
+    news_item = get_object_or_404(News.objects.only('id'), slug=slug)
+    comments, next_cursor = keyset_page(
+        news_item.comments.filter(is_approved=True),
+        ('created_at', 'id'),
+        cursor=request.GET.get('after'),
+        limit=COMMENTS_PER_PAGE,
+    )
+    return Response({
+        'results': NewsCommentSerializer(comments, many=True).data,
+        'next': next_cursor,
+    })
+
+
+@condition(etag_func=roster_etag)
+@api_view(['GET'])
+def players_roster(request):
+    """Действующий состав по амплуа, по возрастанию номеров (ETag — If-None-Match даёт 304)"""
+    return Response(get_roster())
+
+
+@api_view(['GET'])
+def player_by_number(request, number):
+    """Игрок действующего состава по игровому номеру"""
+    player = get_object_or_404(Player, is_active=True, number=number)
+    return Response(PlayerSerializer(player, context={'request': request}).data)
+
+
+@api_view(['GET'])
+def album_photos(request, album_id):
+    """Фото альбома порциями по keyset-курсору (?after=...) — для бесконечной прокрутки"""
+    album = get_object_or_404(Album.objects.only('id'), pk=album_id)
+    photos, next_cursor = keyset_page(
+        album.photos.all(),
+        ('-uploaded_at', '-id'),
+        cursor=request.GET.get('after'),
+        limit=PHOTOS_PER_PAGE,
+    )
+    return Response({
+        'results': PhotoGridSerializer(photos, many=True).data,
+        'next': next_cursor,
+    })
+
+
+@api_view(['GET'])
+def season_detail(request, season_id):
+    """Результаты, таблица и лидеры сезона; архивный сезон отдаётся из снимка как есть"""
+    raw = get_season_json(season_id)
+    if raw is None:
+        raise Http404
+    return HttpResponse(raw, content_type='application/json')
+
+
+@api_view(['GET'])
+def opponent_head_to_head(request, opponent_id):
+    """Личные встречи с соперником по всем сезонам"""
+    opponent = get_object_or_404(Opponent, pk=opponent_id)
+    return Response(head_to_head(opponent))
+
+
+@api_view(['GET'])
+def season_trend(request, season_id):
+    """Помесячная динамика сезона"""
+    season = get_object_or_404(Season, pk=season_id)
+    return Response(season_trends(season))
+
+
+@api_view(['GET'])
+def trends(request):
+    """Динамика сезон к сезону"""
+    return Response(seasons_trends())
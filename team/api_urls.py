@@ -0,0 +1,24 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import api
+
+router = DefaultRouter()
+router.register(r'players', api.PlayerViewSet)
+router.register(r'matches', api.MatchViewSet)
+router.register(r'news', api.NewsViewSet)
+router.register(r'albums', api.AlbumViewSet)
+
+urlpatterns = [
+    path('', api.api_home, name='api_home'),
+    # До router: иначе 'roster' и 'by-number' совпадут с players/<pk>/
+    path('players/roster/', api.players_roster, name='api_players_roster'),
+    path('players/by-number/<int:number>/', api.player_by_number, name='api_player_by_number'),
+    path('current-season/', api.current_season, name='api_current_season'),
+    path('seasons/<int:season_id>/', api.season_detail, name='api_season_detail'),
+    path('seasons/<int:season_id>/trends/', api.season_trend, name='api_season_trends'),
+    path('trends/', api.trends, name='api_trends'),
+    path('opponents/<int:opponent_id>/head-to-head/', api.opponent_head_to_head, name='api_head_to_head'),
+    path('news/<slug:slug>/comments/', api.news_comments, name='api_news_comments'),
+    path('albums/<int:album_id>/photos/', api.album_photos, name='api_album_photos'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PlayerApplication
+
+
+# ===== ЗАЯВКИ В КОМАНДУ =====
+# Повторная отправка формы (тот же телефон или email в пределах
+# APPLICATION_DEDUP_HOURS) не создаёт новую заявку, а увеличивает счётчик
+# повторов. Тренерам уходит не письмо на каждую заявку, а сводка по всем
+# ожидающим — пачкой писем через одно SMTP-соединение.
+
+def submit_application(form):
+    """Сохраняет заявку из JoinForm или отмечает повтор уже поданной. Возвращает (заявка, новая ли)"""
+    application = form.save(commit=False)
+    phone_key = PlayerApplication.normalize_phone(application.phone)
+    email_key = PlayerApplication.normalize_email(application.email)
+
+    same_person = Q()
+    if phone_key:
+        same_person |= Q(phone_key=phone_key)
+    if email_key:
+        same_person |= Q(email_key=email_key)
+    if not same_person:
+        application.save()
+        return application, True
+
+    since = timezone.now() - timedelta(hours=settings.APPLICATION_DEDUP_HOURS)
+    with transaction.atomic():
+        existing = (
+            PlayerApplication.objects.select_for_update()
+            .filter(same_person, submitted_at__gte=since)
+            .order_by('-submitted_at')
+            .first()
+        )
+        if existing is None:
+            application.save()
+            return application, True
+        PlayerApplication.objects.filter(pk=existing.pk).update(repeats=F('repeats') + 1)
+    return existing, False
+
+
+def pending_applications():
+    """Заявки, ещё не попавшие в сводку тренерам"""
+    return PlayerApplication.objects.filter(notified_at__isnull=True).order_by('submitted_at')
+
+
+def _describe(application):
+    lines = [
+        f'{application.name}, {application.age} лет — {application.get_position_display()}',
+        f'Телефон: {application.phone}',
+    ]
+    if application.email:
+        lines.append(f'Email: {application.email}')
+    if application.experience:
+        lines.append(f'Опыт: {application.experience}')
+    if application.repeats:
+        lines.append(f'Отправлял(а) форму повторно: {application.repeats}')
+    lines.append(f'Подана: {timezone.localtime(application.submitted_at):%d.%m.%Y %H:%M}')
+    return '\n'.join(lines)
+
+
+def digest_messages(applications):
+    """Письма сводки: по APPLICATION_DIGEST_SIZE заявок в каждом"""
+    size = settings.APPLICATION_DIGEST_SIZE
+    messages = []
+    for start in range(0, len(applications), size):
+        chunk = applications[start:start + size]
+        messages.append(EmailMessage(
+            subject=f'Новые заявки в «ИСКРА»: {len(chunk)}',
+            body='\n\n'.join(_describe(application) for application in chunk),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=settings.COACH_EMAILS,
+        ))
+    return messages
+
+
+def send_digest(connection=None):
+    """Отправляет сводку по ожидающим заявкам. Возвращает (заявок, писем)"""
+    with transaction.atomic():
+        # Параллельный запуск пропускает заявки, которые уже отправляет первый
+        applications = list(pending_applications().select_for_update(skip_locked=True))
+        if not applications:
+            return 0, 0
+
+        messages = digest_messages(applications)
+        connection = connection or get_connection()
+        # Одно соединение на все письма; при ошибке SMTP транзакция откатывается
+        # и заявки остаются в очереди до следующего запуска
+        connection.send_messages(messages)
+        PlayerApplication.objects.filter(pk__in=[application.pk for application in applications]).update(
+            notified_at=timezone.now(),
+        )
+    return len(applications), len(messages)
@@ -0,0 +1,154 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import get_read_db, reset_read_db, set_read_db
+
+
+# ===== ПОКОЛЕНИЯ КОНТЕНТА =====
+# У каждого раздела (news, gallery, ...) есть номер поколения в кэше.
+# Ключи производных данных содержат этот номер, поэтому при изменении
+# контента достаточно увеличить его — старые записи просто истекут сами.
+# Если кэш недоступен, всё считается напрямую, как раньше.
+
+def _generation_key(namespace):
+    return f'gen:{namespace}'
+
+
+def _bumped_key(namespace):
+    return f'gen:{namespace}:bumped'
+
+
+def get_generation(namespace):
+    """Текущее поколение раздела или None, если кэш недоступен"""
+    key = _generation_key(namespace)
+    try:
+        generation = cache.get(key)
+        if generation is None:
+            # Начинаем с отметки времени, а не с 1: если ключ вытеснен из Redis,
+            # новое поколение не совпадёт со старыми записями
+            cache.add(key, int(time.time() * 1000), None)
+            generation = cache.get(key)
+        return generation
+    except Exception:
+        return None
+
+
+def bump_generation(*namespaces):
+    """Сбрасывает производные данные разделов (вызывается из сигналов)"""
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+        except Exception:
+            continue
+        try:
+            cache.set(_bumped_key(namespace), 1, settings.REPLICA_STICKY_SECONDS)
+        except Exception:
+            pass
+
+
+def _recently_bumped(namespace):
+    try:
+        return cache.get(_bumped_key(namespace)) is not None
+    except Exception:
+        return True
+
+
+def get_or_compute(namespace, key, compute, timeout=None):
+    """Значение из кэша текущего поколения раздела; при промахе — compute()"""
+    generation = get_generation(namespace)
+    if generation is None:
+        return compute()
+
+    full_key = f'{namespace}:{generation}:{key}'
+    timeout = matchday_timeout(timeout or settings.CACHE_TTL)
+    try:
+        value = cache.get(full_key)
+        if value is not None and _pinning.get():
+            cache.touch(full_key, timeout)
+    except Exception:
+        return compute()
+    if value is None:
+        # Сразу после сброса реплика может ещё не видеть изменение: тогда
+        # новое поколение заполняется с основной базы, а не старыми данными
+        token = None
+        if get_read_db() != 'default' and _recently_bumped(namespace):
+            token = set_read_db('default')
+        try:
+            value = compute()
+            try:
+                cache.set(full_key, value, timeout)
+            except Exception:
+                pass
+        finally:
+            if token is not None:
+                reset_read_db(token)
+    return value
+
+
+# ===== РЕЖИМ МАТЧА =====
+# На время матча (manage.py matchday) записи get_or_compute живут до конца
+# режима, а не CACHE_TTL: горячие данные не истекают посреди наплыва.
+# Признак режима — ключ в общем кэше; воркер перечитывает его не чаще
+# раза в MATCHDAY_CHECK_SECONDS.
+
+MATCHDAY_KEY = 'matchday:until'
+MATCHDAY_CHECK_SECONDS = 5
+
+_matchday = {'until': None, 'checked': 0.0}
+_pinning = ContextVar('pinning', default=False)
+
+
+def matchday_until():
+    """Время окончания режима матча (timestamp) или None, если режим выключен"""
+    now = time.time()
+    if now - _matchday['checked'] >= MATCHDAY_CHECK_SECONDS:
+        try:
+            until = cache.get(MATCHDAY_KEY)
+        except Exception:
+            until = None
+        _matchday.update(until=until, checked=now)
+    until = _matchday['until']
+    return until if until and until > now else None
+
+
+def start_matchday(until):
+    """Включает режим матча до until (timestamp) для всех воркеров; False, если кэш недоступен"""
+    try:
+        cache.set(MATCHDAY_KEY, until, max(1, int(until - time.time())))
+    except Exception:
+        return False
+    _matchday.update(until=until, checked=time.time())
+    return True
+
+
+def stop_matchday():
+    try:
+        cache.delete(MATCHDAY_KEY)
+    except Exception:
+        pass
+    _matchday.update(until=None, checked=time.time())
+
+
+def matchday_timeout(timeout):
+    """TTL записи с учётом режима матча: не раньше его окончания"""
+    until = matchday_until()
+    if until is None:
+        return timeout
+    return max(timeout, int(until - time.time()))
+
+
+@contextmanager
+def pinned():
+    """Найденные в кэше записи продлеваются до конца режима матча (прогрев)"""
+    token = _pinning.set(True)
+    try:
+        yield
+    finally:
+        _pinning.reset(token)
@@ -0,0 +1,165 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from .models import (
+    Album, LeagueStanding, Match, MatchSet, News, NewsComment, Opponent, Photo, Player, Season,
+)
+from .routers import PRIMARY_COOKIE
+
+logger = logging.getLogger(__name__)
+
+
+# ===== СТАТИЧЕСКИЙ ЭКСПОРТ ПУБЛИЧНЫХ СТРАНИЦ =====
+# Страницы, которые меняются только из админки, рендерятся в файлы
+# STATIC_EXPORT_ROOT/<путь>/index.html (RSS — index.xml) и отдаются
+# ExportedPageMiddleware без шаблонов и запросов к БД. Страницы с
+# параметрами (?page=, ?after=) по-прежнему рендерит Django.
+
+EXPORT_HEADER = 'HTTP_X_STATIC_EXPORT'
+
+# Токен CSRF в форме комментария подставляется при выдаче файла
+CSRF_PLACEHOLDER = '__csrf_token__'
+re_csrf_input = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+EXPORT_FILES = {
+    'text/html': 'index.html',
+    'application/rss+xml': 'index.xml',
+}
+
+
+def export_file(path):
+    """Каталог файла экспорта для пути URL или None, если путь не подходит"""
+    if not path.endswith('/') or '..' in path.split('/'):
+        return None
+    return os.path.join(settings.STATIC_EXPORT_ROOT, path.strip('/'))
+
+
+def all_paths():
+    """Все экспортируемые страницы"""
+    paths = [reverse('players'), reverse('matches'), reverse('our_results'), reverse('news_feed')]
+    paths += [reverse('news_detail', args=[slug]) for slug in News.objects.values_list('slug', flat=True)]
+    paths += [reverse('album_detail', args=[pk]) for pk in Album.objects.values_list('pk', flat=True)]
+    return paths
+
+
+def paths_for(instance):
+    """Страницы, на которые влияет изменённый объект"""
+    if isinstance(instance, Player):
+        return [reverse('players')]
+    if isinstance(instance, (Match, MatchSet, Opponent, Season)):
+        return [reverse('matches'), reverse('our_results')]
+    if isinstance(instance, LeagueStanding):
+        return [reverse('our_results')]
+    if isinstance(instance, News):
+        paths = [reverse('news_detail', args=[instance.slug]), reverse('news_feed')]
+        loaded_slug = getattr(instance, '_loaded_slug', None)
+        if loaded_slug and loaded_slug != instance.slug:
+            # Старый адрес теперь отдаёт 404 — при экспорте его каталог удаляется
+            paths.append(reverse('news_detail', args=[loaded_slug]))
+        return paths
+    if isinstance(instance, NewsComment):
+        # Новость могла быть удалена вместе с комментариями
+        slug = News.objects.filter(pk=instance.news_id).values_list('slug', flat=True).first()
+        return [reverse('news_detail', args=[slug])] if slug else []
+    if isinstance(instance, Album):
+        return [reverse('album_detail', args=[instance.pk])]
+    if isinstance(instance, Photo):
+        return [reverse('album_detail', args=[instance.album_id])]
+    return []
+
+
+def _write(directory, name, content):
+    os.makedirs(directory, exist_ok=True)
+    # Через временный файл и os.replace: воркеры не увидят недописанную страницу
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.export-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, os.path.join(directory, name))
+
+
+def _remove(directory):
+    for name in EXPORT_FILES.values():
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    try:
+        os.rmdir(directory)
+    except OSError:
+        # Каталога нет или в нём вложенные страницы
+        pass
+
+
+def export_paths(paths):
+    """Рендерит страницы в файлы; удалённые (404) убирает. Возвращает {путь: размер или None}"""
+    from django.test import Client  # только для экспорта, не при каждом импорте middleware
+
+    client = Client(HTTP_HOST=settings.STATIC_EXPORT_HOST, **{EXPORT_HEADER: '1'})
+    # Только что сохранённое читаем с основной базы, а не с отстающей реплики
+    client.cookies[PRIMARY_COOKIE] = '1'
+
+    result = {}
+    for path in dict.fromkeys(paths):
+        directory = export_file(path)
+        if directory is None:
+            continue
+        # За SECURE_SSL_REDIRECT обычный http-запрос получил бы 301
+        response = client.get(path, secure=True)
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if response.status_code == 404:
+            _remove(directory)
+            result[path] = None
+        elif response.status_code == 200 and content_type in EXPORT_FILES:
+            content = response.content
+            if content_type == 'text/html':
+                content = re_csrf_input.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content.decode()).encode()
+            _write(directory, EXPORT_FILES[content_type], content)
+            result[path] = len(content)
+        else:
+            logger.warning('Экспорт %s: ответ %s, страница пропущена', path, response.status_code)
+    return result
+
+
+_pending = threading.local()
+
+
+def schedule_export(instance):
+    """Перерисовывает страницы объекта после коммита (режим STATIC_EXPORT)"""
+    schedule_paths(paths_for(instance))
+
+
+def schedule_paths(paths):
+    """Перерисовывает страницы после коммита — для изменений без сигналов (bulk_update)"""
+    if not paths:
+        return
+    # Сохранение матча в админке — это и матч, и его партии: пути копятся в
+    # общем буфере, и первый же колбэк после коммита рендерит их все по разу,
+    # остальные находят буфер пустым. Колбэк регистрируется на каждое
+    # сохранение: если транзакцию откатили и её колбэки отброшены, пути в
+    # буфере не застревают — их заберёт следующий коммит.
+    pending = getattr(_pending, 'paths', None)
+    if pending is None:
+        pending = _pending.paths = {}
+    pending.update(dict.fromkeys(paths))
+    # Вне транзакции on_commit вызывает _flush сразу
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    paths = list(getattr(_pending, 'paths', None) or ())
+    _pending.paths = None
+    if not paths:
+        return
+    try:
+        export_paths(paths)
+    except Exception:
+        # Сохранение в админке не должно падать из-за экспорта
+        logger.exception('Экспорт страниц %s не выполнен', paths)
@@ -9,13 +9,13 @@ class LatestNewsFeed(Feed):
     description = "Последние новости волейбольного клуба «ИСКРА»"
 
     def items(self):
-        return News.objects.all()[:10]
+        return News.objects.defer('content')[:10]
 
     def item_title(self, item):
         return item.title
 
     def item_description(self, item):
-        return item.content[:200] + "..." if len(item.content) > 200 else item.content
+        return item.excerpt
 
     def item_pubdate(self, item):
         return item.created_at
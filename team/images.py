@@ -0,0 +1,72 @@
+import base64
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Ширины для srcset: карточка сетки на телефоне, на десктопе и крупный просмотр
+RENDITION_WIDTHS = (320, 640, 1280)
+# Заглушка LQIP: картинка 16 px по ширине, в data URI — пара сотен байт
+PLACEHOLDER_WIDTH = 16
+JPEG_QUALITY = 80
+
+
+# ===== РЕНДЕРЫ ФОТОГРАФИЙ =====
+# Считаются один раз при загрузке фото: размеры, размытая заглушка и
+# уменьшенные копии для srcset. Копии сохраняются в хранилище по содержимому,
+# поэтому одно и то же фото в разных альбомах обрабатывается один раз.
+
+def _open(field_file):
+    from PIL import Image, ImageOps
+
+    field_file.open('rb')
+    try:
+        image = Image.open(field_file)
+        image.load()
+    finally:
+        field_file.close()
+    # Учитываем поворот с телефона (EXIF), иначе width/height перепутаны
+    image = ImageOps.exif_transpose(image)
+    return image.convert('RGB')
+
+
+def _jpeg(image, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, **options)
+    return buffer.getvalue()
+
+
+def _resized(image, width):
+    from PIL import Image
+
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def build_photo_fields(field_file):
+    """Размеры, заглушка и рендеры фото — словарь полей Photo (пустой, если файл не читается)"""
+    try:
+        image = _open(field_file)
+    except Exception:
+        logger.warning('Фото %s не удалось обработать', field_file.name, exc_info=True)
+        return {}
+
+    small = _resized(image, PLACEHOLDER_WIDTH)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(_jpeg(small)).decode()
+
+    renditions = {}
+    for width in RENDITION_WIDTHS:
+        if width >= image.width:
+            break
+        content = ContentFile(_jpeg(_resized(image, width), progressive=True), name=f'{width}.jpg')
+        renditions[str(width)] = default_storage.save(f'renditions/{width}.jpg', content)
+
+    return {
+        'width': image.width,
+        'height': image.height,
+        'placeholder': placeholder,
+        'renditions': renditions,
+    }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from team.models import Season
+from team.seasons import SNAPSHOT_VERSION, archive_season
+
+
+class Command(BaseCommand):
+    help = 'Замораживает завершённые сезоны в сжатые снимки (результаты, таблица, лидеры)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_ids', nargs='*', type=int, help='ID сезонов')
+        parser.add_argument('--all', action='store_true', help='Все неактивные сезоны без архива или с архивом старого формата')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            seasons = Season.objects.filter(
+                Q(snapshot__isnull=True) | Q(snapshot__version__lt=SNAPSHOT_VERSION), is_active=False,
+            )
+        elif options['season_ids']:
+            seasons = Season.objects.filter(pk__in=options['season_ids'])
+        else:
+            raise CommandError('Укажите ID сезонов или --all')
+
+        for season in seasons:
+            try:
+                snapshot = archive_season(season)
+            except ValueError as exc:
+                self.stderr.write(str(exc))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{season}: архив v{snapshot.version}, {len(snapshot.data)} байт'
+            ))
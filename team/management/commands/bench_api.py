@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from team.api import MatchViewSet, PlayerViewSet
+from team.models import Match, Opponent, Player, Season
+from team.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость списков API: сериализатор DRF против values()-проекции'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Сколько временных строк добавить для замера')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+            self._fill(options['rows'])
+            self.stdout.write(f"{'список':<10}{'путь':<14}{'строк/с':>12}{'мс':>10}")
+            for name, viewset in (('matches', MatchViewSet), ('players', PlayerViewSet)):
+                self._bench(name, viewset, options['repeat'])
+            # Временные строки не сохраняем
+            transaction.set_rollback(True)
+
+    def _fill(self, rows):
+        if not rows:
+            return
+        season = Season.objects.create(name='bench', is_active=False)
+        opponent = Opponent.objects.create(name='bench')
+        now = timezone.now()
+        # bulk_create не вызывает Match.save(), очки считаем сами
+        Match.objects.bulk_create(
+            Match(season=season, opponent=opponent, date=now + timedelta(hours=i), location='bench',
+                  sets_home=i % 4, sets_away=(i // 4) % 4, points=Match.calculate_points(i % 4, (i // 4) % 4))
+            for i in range(rows)
+        )
+        Player.objects.bulk_create(
+            # Номера за пределами настоящего состава: в составе они уникальны
+            Player(name=f'bench {i}', position='libero', number=10000 + i) for i in range(rows)
+        )
+
+    def _view(self, viewset, name):
+        view = viewset()
+        view.request = Request(APIRequestFactory().get(f'/api/{name}/'))
+        view.format_kwarg = None
+        view.action = 'list'
+        view.args, view.kwargs = (), {}
+        return view
+
+    def _bench(self, name, viewset, repeat):
+        view = self._view(viewset, name)
+        queryset = view.get_queryset()
+        count = queryset.count()
+
+        def serializer_path():
+            data = view.get_serializer(queryset, many=True).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            return FastJSONRenderer().render(list(view.stream_items(queryset)))
+
+        outputs = {}
+        for label, func in (('serializer', serializer_path), ('values+fast', fast_path)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                outputs[label] = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            self.stdout.write(f'{name:<10}{label:<14}{count / best:>12.0f}{best * 1000:>10.1f}')
+
+        if outputs['serializer'] != outputs['values+fast']:
+            self.stdout.write(self.style.ERROR(f'{name}: ответы отличаются!'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{name}: ответы совпадают байт в байт'))
@@ -0,0 +1,53 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+
+class Command(BaseCommand):
+    help = 'Замеряет, сколько времени запроса уходит на подключение к БД в текущем режиме DB_POOL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Сколько «запросов» имитировать')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        self.stdout.write(
+            f"БД: {connection.vendor}, DB_POOL={settings.DB_POOL}, "
+            f"CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, "
+            f"CONN_HEALTH_CHECKS={connection.settings_dict['CONN_HEALTH_CHECKS']}"
+        )
+        self.stdout.write(f"{'режим':<34}{'среднее, мс':>14}{'p95, мс':>10}")
+
+        # Как при CONN_MAX_AGE=0 без пула: каждый запрос открывает новое соединение
+        connection.close()
+        self._report('новое соединение на запрос', self._measure(count, self._reconnect))
+        # Как в работе: между запросами Django вызывает close_old_connections()
+        # (соединение остаётся, проверяется health check или возвращается в пул)
+        self._report('текущие настройки', self._measure(count, self._request_cycle))
+
+    def _reconnect(self):
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            # Закрытие вернёт соединение в пул — для честного сравнения открываем новое
+            connection.close_pool()
+
+    def _request_cycle(self):
+        close_old_connections()
+
+    def _measure(self, count, between):
+        samples = []
+        for _ in range(count):
+            between()
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    def _report(self, label, samples):
+        p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        self.stdout.write(f'{label:<34}{statistics.mean(samples):>14.3f}{p95:>10.3f}')
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from team.export import all_paths, export_paths
+
+
+class Command(BaseCommand):
+    help = 'Рендерит публичные страницы в статические файлы (STATIC_EXPORT_ROOT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Пути страниц, например /players/ (по умолчанию — все)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or all_paths()
+        result = export_paths(paths)
+        for path, size in result.items():
+            self.stdout.write(f'{path:<40} {"удалена" if size is None else f"{size} байт"}')
+        skipped = [path for path in dict.fromkeys(paths) if path not in result]
+        if skipped and not result:
+            # Ни одной страницы (например, все ответили редиректом) — сборка должна это заметить
+            raise CommandError(f'Ни одна страница не экспортирована, пропущено: {", ".join(skipped)}')
+        for path in skipped:
+            self.stderr.write(f'пропущена: {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Экспортировано страниц: {sum(size is not None for size in result.values())} в {settings.STATIC_EXPORT_ROOT}'
+        ))
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from team.caching import matchday_until, start_matchday, stop_matchday
+from team.matchday import hot_paths, matchday_end, upcoming_matches, warm
+from team.models import Match
+
+
+class Command(BaseCommand):
+    help = (
+        'Режим матча: перед ближайшим матчем прогревает кэш, продлевает его до конца матча '
+        'и переводит тяжёлые разделы на снимки (запускать по cron каждые 15–30 минут)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--match', type=int, help='Включить режим для матча с этим ID, не глядя на время')
+        parser.add_argument('--dry-run', action='store_true', help='Показать план, ничего не меняя')
+        parser.add_argument('--stop', action='store_true', help='Выключить режим матча')
+
+    def handle(self, *args, **options):
+        if options['stop']:
+            stop_matchday()
+            self.stdout.write(self.style.SUCCESS('Режим матча выключен'))
+            return
+
+        if options['match']:
+            matches = list(Match.objects.select_related('opponent').filter(pk=options['match']))
+            if not matches:
+                raise CommandError(f'Матч {options["match"]} не найден')
+        else:
+            matches = list(upcoming_matches())
+        if not matches:
+            self._report_next()
+            return
+
+        until = matchday_end(matches).timestamp()
+        current = matchday_until()
+        if current:
+            until = max(until, current)
+        paths = hot_paths(matches)
+
+        ends = datetime.fromtimestamp(until, tz=timezone.get_current_timezone())
+        for match in matches:
+            self.stdout.write(f'Матч: {match} ({timezone.localtime(match.date):%d.%m %H:%M})')
+        self.stdout.write(f'Режим до {ends:%d.%m %H:%M}, снимки: {", ".join(settings.MATCHDAY_DEGRADED_PATHS)}')
+        if options['dry_run']:
+            for path in paths:
+                self.stdout.write(f'  {path}')
+            return
+
+        if not start_matchday(until):
+            raise CommandError('Кэш недоступен: режим матча не включён, прогревать некуда')
+        start = time.perf_counter()
+        results = warm(paths)
+        total = (time.perf_counter() - start) * 1000
+
+        failed = 0
+        for path, (status, ms) in results.items():
+            if status != 200:
+                failed += 1
+            self.stdout.write(f'{ms:8.1f} мс  {status or "ошибка"}  {path}')
+        summary = f'Прогрето страниц: {len(results) - failed} из {len(results)} за {total:.0f} мс'
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
+
+    def _report_next(self):
+        match = Match.objects.filter(date__gt=timezone.now()).select_related('opponent').order_by('date').first()
+        if match is None:
+            self.stdout.write('Предстоящих матчей нет')
+            return
+        self.stdout.write(
+            f'Ближайший матч: {match} ({timezone.localtime(match.date):%d.%m %H:%M}); '
+            f'режим включится за {settings.MATCHDAY_LEAD_MINUTES} мин до начала'
+        )
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from team.media import referenced_names
+from team.storage import blob_digest, file_digest
+
+
+class Command(BaseCommand):
+    help = 'Ищет в MEDIA_ROOT файлы без ссылок из БД и проверяет целостность блобов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Удалить найденные файлы без ссылок')
+        parser.add_argument('--verify', action='store_true', help='Сверить sha256 блобов с их именами')
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE_MINUTES,
+            help='Не трогать файлы моложе N минут (загрузка могла ещё не сохраниться в БД)',
+        )
+
+    def handle(self, *args, **options):
+        root = settings.MEDIA_ROOT
+        referenced = referenced_names()
+        cutoff = time.time() - options['grace'] * 60
+
+        orphans, corrupted = [], []
+        total = reclaimable = 0
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                stat = os.stat(path)
+                total += stat.st_size
+
+                if options['verify'] and blob_digest(name):
+                    with open(path, 'rb') as f:
+                        if file_digest(f) != blob_digest(name):
+                            corrupted.append(name)
+
+                if name not in referenced and stat.st_mtime < cutoff:
+                    orphans.append(name)
+                    reclaimable += stat.st_size
+
+        for name in orphans:
+            self.stdout.write(f'без ссылок: {name}')
+            if options['delete']:
+                os.remove(os.path.join(root, name))
+        for name in corrupted:
+            self.stderr.write(f'содержимое не совпадает с хэшем: {name}')
+
+        action = 'удалено' if options['delete'] else 'можно удалить'
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов: {total / 1024 / 1024:.1f} МБ, без ссылок: {len(orphans)} '
+            f'({action} {reclaimable / 1024 / 1024:.1f} МБ)'
+            + (f', повреждено: {len(corrupted)}' if options['verify'] else '')
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from team.models import Photo
+
+
+class Command(BaseCommand):
+    help = 'Считает размеры, заглушки и уменьшенные копии для фото, загруженных до их появления'
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for photo in Photo.objects.filter(placeholder='').iterator():
+            photo.process_image()
+            if photo.placeholder:
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано фото: {done}, не удалось: {failed}'))
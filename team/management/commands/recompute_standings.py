@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from team.models import LeagueStanding, Season
+from team.standings import rebuild_season
+
+
+class Command(BaseCommand):
+    help = 'Переносит наши матчи в календарь лиги и заново считает турнирную таблицу сезона'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_ids', nargs='*', type=int, help='ID сезонов')
+        parser.add_argument('--active', action='store_true', help='Активный сезон')
+
+    def handle(self, *args, **options):
+        if options['active']:
+            seasons = Season.objects.filter(is_active=True)
+        elif options['season_ids']:
+            seasons = Season.objects.filter(pk__in=options['season_ids'])
+        else:
+            raise CommandError('Укажите ID сезонов или --active')
+
+        for season in seasons:
+            if not rebuild_season(season):
+                self.stdout.write(self.style.WARNING(
+                    f'{season}: матчи перенесены в календарь, таблица ведётся вручную — не пересчитана'
+                ))
+                continue
+            teams = LeagueStanding.objects.filter(season=season).count()
+            self.stdout.write(self.style.SUCCESS(f'{season}: таблица пересчитана, команд — {teams}'))
@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from team.applications import digest_messages, pending_applications, send_digest
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Отправляет тренерам сводку по новым заявкам в команду (запускать по расписанию)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Показать письма, ничего не отправляя')
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Работать воркером: отправлять сводку каждые N минут',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for message in digest_messages(list(pending_applications())):
+                self.stdout.write(f'Кому: {", ".join(message.to)}\nТема: {message.subject}\n\n{message.body}\n')
+            return
+
+        if not options['every']:
+            self._send()
+            return
+
+        while True:
+            # Между итерациями соединение могло закрыться на стороне базы, а
+            # CONN_HEALTH_CHECKS проверяет его только в цикле запроса
+            close_old_connections()
+            try:
+                self._send()
+            except Exception:
+                # Ошибка SMTP или базы: заявки остались в очереди, попробуем в следующий раз
+                logger.exception('Сводка заявок не отправлена')
+            time.sleep(options['every'] * 60)
+
+    def _send(self):
+        applications, messages = send_digest()
+        if applications:
+            self.stdout.write(self.style.SUCCESS(f'Отправлено заявок: {applications}, писем: {messages}'))
+        else:
+            self.stdout.write('Новых заявок нет')
@@ -0,0 +1,50 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Запускается в отдельном процессе, чтобы измерить холодный старт воркера
+PROBE = """
+import time
+start = time.perf_counter()
+import iskra.wsgi
+boot = time.perf_counter()
+from team.warmup import warm_up
+warm_up(connect=False)
+print('BOOT_MS %.1f WARM_MS %.1f' % ((boot - start) * 1000, (time.perf_counter() - boot) * 1000))
+"""
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)')
+
+
+class Command(BaseCommand):
+    help = 'Профиль холодного старта: python -X importtime + время прогрева'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Сколько самых дорогих импортов показать')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'iskra.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        # Собственное (self) время импорта всех модулей, сгруппированное по пакету верхнего уровня
+        packages = {}
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                name = match.group(2).split('.')[0]
+                packages[name] = packages.get(name, 0) + int(match.group(1))
+
+        self.stdout.write(result.stdout.strip())
+        self.stdout.write(f"{'пакет':<30}{'мс':>10}")
+        for name, micros in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'{name:<30}{micros / 1000:>10.1f}')
@@ -0,0 +1,73 @@
+import gzip
+import json
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from team.models import Album, News
+
+INLINE_CSS = re.compile(rb'style="[^"]*"|<style>.*?</style>', re.S)
+
+
+def public_pages():
+    pages = [reverse(name) for name in ('home', 'players', 'matches', 'news_list', 'gallery', 'our_results')]
+    news = News.objects.only('slug').first()
+    if news:
+        pages.append(reverse('news_detail', args=[news.slug]))
+    album = Album.objects.only('id').first()
+    if album:
+        pages.append(reverse('album_detail', args=[album.id]))
+    return pages
+
+
+class Command(BaseCommand):
+    help = 'Отчёт о размерах страниц и статики: встроенный CSS, gzip, brotli'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--save', help='Сохранить размеры страниц в JSON (базовая линия)')
+        parser.add_argument('--compare', help='Сравнить с сохранённой базовой линией и показать экономию')
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if options['compare'] and os.path.exists(options['compare']):
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        report = {}
+        client = Client()
+        self.stdout.write(f"{'страница':<32}{'HTML':>9}{'gzip':>8}{'inline CSS':>12}{'сэкономлено':>13}")
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            for url in public_pages():
+                response = client.get(url)
+                if response.status_code != 200:
+                    self.stdout.write(f'{url:<32} HTTP {response.status_code}')
+                    continue
+                html = response.content
+                inline = sum(len(chunk) for chunk in INLINE_CSS.findall(html))
+                report[url] = {'html': len(html), 'gzip': len(gzip.compress(html)), 'inline_css': inline}
+                saved = baseline[url]['html'] - len(html) if url in baseline else ''
+                self.stdout.write(
+                    f"{url:<32}{len(html):>9}{report[url]['gzip']:>8}{inline:>12}{saved:>13}"
+                )
+
+        self.stdout.write('')
+        self.stdout.write(f"{'статика':<48}{'байт':>9}{'gzip':>8}{'brotli':>8}")
+        for name in self._css_files():
+            path = os.path.join(settings.STATIC_ROOT, name)
+            sizes = [os.path.getsize(p) if os.path.exists(p) else '-' for p in (path, path + '.gz', path + '.br')]
+            self.stdout.write(f'{name:<48}{sizes[0]:>9}{sizes[1]:>8}{sizes[2]:>8}')
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def _css_files(self):
+        # Файлы с отпечатком из манифеста collectstatic; без манифеста — ничего
+        manifest = getattr(staticfiles_storage, 'hashed_files', {})
+        return sorted(name for name in manifest.values() if name.startswith('team/') and name.endswith('.css'))
@@ -0,0 +1,157 @@
+import logging
+import time
+from contextvars import ContextVar
+from urllib.parse import urlencode
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import matchday_timeout, pinned
+from .export import EXPORT_HEADER
+from .models import Match, Season
+
+logger = logging.getLogger(__name__)
+
+
+# ===== РЕЖИМ МАТЧА: ПЛАН И ПРОГРЕВ =====
+# Когда будет наплыв, известно заранее — это Match.date. Команда matchday
+# (по cron) за MATCHDAY_LEAD_MINUTES до начала включает режим матча до
+# date + MATCHDAY_DURATION_MINUTES, прогревает горячие страницы и продлевает
+# их записи в кэше (team.caching). Тяжёлые разделы (MATCHDAY_DEGRADED_PATHS)
+# в режиме отдаются из снимков (MatchdayMiddleware): корни разделов снимаются
+# при прогреве, остальные страницы (альбомы, ?page=N, подгрузка фото) — при
+# первом запросе. Каждую страницу рендерит один воркер за раз, так что галерея
+# не конкурирует с таблицей и счётом матча. Снимок определяют только путь и
+# SNAPSHOT_PARAMS: с посторонними параметрами (?x=<случайное>) отдаётся снимок
+# той же страницы или 503 — такие запросы до базы не доходят.
+
+SNAPSHOT_PREFIX = 'matchday:page:'
+SNAPSHOT_PARAMS = ('page', 'after', 'before')
+RENDER_LOCK_PREFIX = 'matchday:render:'
+# Сколько ждать снимка, пока страницу рендерит другой воркер
+RENDER_RETRY_SECONDS = 5
+
+_warming = ContextVar('matchday_warming', default=False)
+
+
+def upcoming_matches(now=None):
+    """Матчи, для которых сейчас нужен режим: скоро начнутся или ещё идут"""
+    now = now or timezone.now()
+    return Match.objects.filter(
+        date__gte=now - timedelta(minutes=settings.MATCHDAY_DURATION_MINUTES),
+        date__lte=now + timedelta(minutes=settings.MATCHDAY_LEAD_MINUTES),
+    ).select_related('opponent').order_by('date')
+
+
+def matchday_end(matches):
+    return max(match.date for match in matches) + timedelta(minutes=settings.MATCHDAY_DURATION_MINUTES)
+
+
+def hot_paths(matches):
+    """Страницы, которые открывают во время матча, и снимки тяжёлых разделов"""
+    paths = [
+        reverse('home'), reverse('matches'), reverse('our_results'), reverse('players'), reverse('news_list'),
+        reverse('api_current_season'), reverse('api_players_roster'),
+    ]
+    season = Season.get_active()
+    if season:
+        paths.append(reverse('api_season_detail', args=[season.id]))
+    for match in matches:
+        paths += [reverse('match-detail', args=[match.pk]), reverse('api_head_to_head', args=[match.opponent_id])]
+    paths += settings.MATCHDAY_DEGRADED_PATHS
+    return list(dict.fromkeys(paths))
+
+
+# ===== СНИМКИ ТЯЖЁЛЫХ РАЗДЕЛОВ =====
+def is_degraded(path):
+    return path.startswith(tuple(settings.MATCHDAY_DEGRADED_PATHS))
+
+
+def is_warming():
+    return _warming.get()
+
+
+def _page_key(request):
+    params = [(name, request.GET[name]) for name in SNAPSHOT_PARAMS if name in request.GET]
+    return request.path + ('?' + urlencode(params) if params else '')
+
+
+def has_foreign_params(request):
+    """В запросе есть параметры, не входящие в ключ снимка"""
+    return any(name not in SNAPSHOT_PARAMS for name in request.GET)
+
+
+def _snapshot_key(request):
+    return SNAPSHOT_PREFIX + _page_key(request)
+
+
+def get_snapshot(request):
+    """(содержимое, Content-Type) снимка страницы или None"""
+    try:
+        return cache.get(_snapshot_key(request))
+    except Exception:
+        return None
+
+
+def store_snapshot(request, response):
+    """Сохраняет ответ как снимок до конца режима; потоковый ответ дочитывается"""
+    if response.status_code != 200:
+        return response
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+        response.close()
+        # Прогрев получает уже прочитанное содержимое
+        response = HttpResponse(content, content_type=response['Content-Type'])
+    else:
+        content = response.content
+    try:
+        cache.set(_snapshot_key(request), (content, response['Content-Type']), matchday_timeout(settings.CACHE_TTL))
+    except Exception:
+        logger.warning('Снимок %s не сохранён', request.path, exc_info=True)
+    return response
+
+
+def acquire_render(request):
+    """True — этот воркер рендерит страницу; False — её уже рендерит другой"""
+    try:
+        return cache.add(RENDER_LOCK_PREFIX + _page_key(request), 1, RENDER_RETRY_SECONDS * 6)
+    except Exception:
+        return True
+
+
+def release_render(request):
+    try:
+        cache.delete(RENDER_LOCK_PREFIX + _page_key(request))
+    except Exception:
+        pass
+
+
+def warm(paths):
+    """Запрашивает страницы внутри процесса; возвращает {путь: (статус или None, мс)}"""
+    from django.test import Client  # только для прогрева, не при каждом импорте middleware
+
+    # В обход статического экспорта: нужен рендер представлений, а не файл
+    client = Client(HTTP_HOST=settings.STATIC_EXPORT_HOST, **{EXPORT_HEADER: '1'})
+    results = {}
+    token = _warming.set(True)
+    try:
+        with pinned():
+            for path in paths:
+                start = time.perf_counter()
+                try:
+                    # За SECURE_SSL_REDIRECT обычный http-запрос получил бы 301
+                    response = client.get(path, secure=True)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    status = response.status_code
+                except Exception:
+                    logger.exception('Прогрев %s не выполнен', path)
+                    status = None
+                results[path] = (status, round((time.perf_counter() - start) * 1000, 1))
+    finally:
+        _warming.reset(token)
+    return results
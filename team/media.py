@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import News, Opponent, Photo, Player
+from .storage import blob_digest
+
+# Все поля с файлами: по ним считаются ссылки на блоб
+MEDIA_FIELDS = [
+    (Player, 'photo'),
+    (Opponent, 'logo'),
+    (News, 'cover'),
+    (Photo, 'image'),
+]
+
+
+def referenced_names():
+    """Имена всех файлов, на которые ссылаются строки БД"""
+    names = set()
+    for model, field in MEDIA_FIELDS:
+        names.update(model.objects.exclude(**{field: ''}).values_list(field, flat=True).distinct())
+    # Уменьшенные копии фото живут, пока жива сама фотография
+    for renditions in Photo.objects.values_list('renditions', flat=True):
+        names.update((renditions or {}).values())
+    names.discard(None)
+    return names
+
+
+def is_referenced(name):
+    return any(model.objects.filter(**{field: name}).exists() for model, field in MEDIA_FIELDS)
+
+
+def is_fresh(name):
+    """Блоб записан или переиспользован загрузкой недавно (см. MEDIA_GC_GRACE_MINUTES)"""
+    try:
+        modified = default_storage.get_modified_time(name)
+    except (FileNotFoundError, NotImplementedError):
+        return False
+    return modified > timezone.now() - timedelta(minutes=settings.MEDIA_GC_GRACE_MINUTES)
+
+
+def release(name, source=None):
+    """Удаляет блоб после коммита, если на него больше никто не ссылается.
+
+    source — оригинал, из которого получен рендер: рендер общий для всех
+    фотографий с тем же файлом и удаляется вместе с последней из них.
+    Свежий блоб не удаляется: параллельная загрузка того же содержимого
+    могла уже сослаться на него, но ещё не закоммитить строку. Такие файлы
+    подбирает manage.py media_gc.
+    """
+    if not name or blob_digest(name) is None:
+        # Файлы под старыми именами не трогаем — их подберёт manage.py media_gc
+        return
+
+    def delete():
+        if is_referenced(name) or (source and is_referenced(source)) or is_fresh(name):
+            return
+        default_storage.delete(name)
+
+    transaction.on_commit(delete)
+
+
+def replaced_names(instance, field):
+    """(имя, source) файлов, которые освободятся, если в строке заменили файл поля"""
+    model = type(instance)
+    values = [field, 'renditions'] if model is Photo else [field]
+    old = model.objects.filter(pk=instance.pk).values(*values).first()
+    if old is None or not old[field] or old[field] == getattr(instance, field).name:
+        return []
+    names = [(old[field], None)]
+    if model is Photo:
+        names += [(name, old[field]) for name in (old['renditions'] or {}).values()]
+    return names
@@ -0,0 +1,237 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.middleware.gzip import GZipMiddleware
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .caching import matchday_until
+from .export import CSRF_PLACEHOLDER, EXPORT_FILES, EXPORT_HEADER, export_file
+from .matchday import (
+    RENDER_RETRY_SECONDS, acquire_render, get_snapshot, has_foreign_params, is_degraded, is_warming, release_render,
+    store_snapshot,
+)
+from .profiling import profile_request, profiling_allowed, requested_token
+from .routers import PRIMARY_COOKIE, REPLICA, replica_available, reset_read_db, set_read_db
+
+try:
+    import brotli
+except ImportError:  # без пакета Brotli остаётся только gzip
+    brotli = None
+
+re_accepts_br = _lazy_re_compile(r'\bbr\b')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Сжимаем только текстовые форматы: картинки и архивы уже сжаты
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                      'application/rss+xml', 'image/svg+xml')
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=5)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Сжатие ответов: brotli, если клиент его принимает, иначе gzip (Django).
+
+    Ответы меньше COMPRESSION_MIN_SIZE не трогаем. Страницы с CSRF-токеном
+    отдаём только через gzip: у Django там есть защита от BREACH
+    (случайная длина заголовка), у brotli такой нет.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        accepts_br = re_accepts_br.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        # CsrfViewMiddleware обновляет cookie на каждом ответе, где использован токен
+        uses_csrf = settings.CSRF_COOKIE_NAME in response.cookies
+        if brotli is None or not accepts_br or uses_csrf or (response.streaming and response.is_async):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = _brotli_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=5)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Публичные GET/HEAD-запросы читают с реплики (если REPLICA_DATABASE_URL задан).
+
+    Админка, формы (POST и прочие изменяющие методы) и запросы в течение
+    REPLICA_STICKY_SECONDS после них идут в основную базу: автор сразу
+    видит свой комментарий или правку, даже если реплика отстаёт.
+    """
+
+    cookie_name = PRIMARY_COOKIE
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.admin_prefix = None
+
+    def __call__(self, request):
+        if not replica_available():
+            return self.get_response(request)
+
+        token = set_read_db('default' if self._needs_primary(request) else REPLICA)
+        try:
+            response = self.get_response(request)
+        finally:
+            # Потоковые ответы дочитываются уже после middleware — с основной базы
+            reset_read_db(token)
+
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+    def _needs_primary(self, request):
+        if self.admin_prefix is None:
+            self.admin_prefix = reverse('admin:index')
+        return (
+            request.method not in SAFE_METHODS
+            or request.path.startswith(self.admin_prefix)
+            or self.cookie_name in request.COOKIES
+        )
+
+
+class MatchdayMiddleware:
+    """
+    В режиме матча (manage.py matchday) тяжёлые разделы — MATCHDAY_DEGRADED_PATHS —
+    отдаются из снимков (team/matchday.py) до конца режима.
+
+    Снимка нет — страница рендерится как обычно и сама становится снимком;
+    одну и ту же страницу одновременно рендерит только один воркер, остальным
+    на это время 503 с коротким Retry-After. Запрос с параметрами помимо
+    page/after/before получает снимок страницы без них или 503. Вне режима middleware только
+    проверяет признак режима (он кэшируется в процессе).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not is_degraded(request.path_info):
+            return self.get_response(request)
+        if is_warming():
+            return store_snapshot(request, self.get_response(request))
+        if matchday_until() is None:
+            return self.get_response(request)
+
+        snapshot = get_snapshot(request)
+        if snapshot is not None:
+            content, content_type = snapshot
+            response = HttpResponse(content, content_type=content_type)
+            response.headers['X-Matchday'] = 'cached'
+            return response
+
+        # Посторонние параметры не рендерим: иначе ?x=<случайное> обходит снимки
+        if has_foreign_params(request) or not acquire_render(request):
+            response = HttpResponse(
+                'Страница готовится, повторите запрос', status=503, content_type='text/plain; charset=utf-8',
+            )
+            response.headers['Retry-After'] = str(RENDER_RETRY_SECONDS)
+            return response
+        try:
+            return store_snapshot(request, self.get_response(request))
+        finally:
+            release_render(request)
+
+
+class ProfilingMiddleware:
+    """
+    Профиль запроса по подписанному токену сотрудника (team/profiling.py).
+
+    Стоит сразу после AuthenticationMiddleware: токен проверяется вместе с
+    request.user. Без токена — одна проверка строки запроса и заголовка.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = requested_token(request)
+        if token and profiling_allowed(request, token):
+            return profile_request(request, self.get_response)
+        return self.get_response(request)
+
+
+class ExportedPageMiddleware:
+    """
+    Отдаёт анонимным посетителям страницы из статического экспорта (team/export.py).
+
+    Файл читается с диска на каждый запрос, а не индексируется при старте,
+    как в WhiteNoise: экспорт обновляется сигналами прямо во время работы.
+    Запросы с параметрами, изменяющие методы и залогиненные пользователи
+    (им нужна актуальная страница) идут в Django как обычно.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_EXPORT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and not request.GET
+            and EXPORT_HEADER not in request.META
+            and not request.user.is_authenticated
+        ):
+            response = self._exported(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def _exported(self, request):
+        directory = export_file(request.path_info)
+        if directory is None:
+            return None
+        for content_type, name in EXPORT_FILES.items():
+            try:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    content = f.read()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            response = HttpResponse(content_type=f'{content_type}; charset=utf-8')
+            placeholder = CSRF_PLACEHOLDER.encode()
+            if placeholder in content:
+                # Токен — свой на каждый запрос; cookie выставит CsrfViewMiddleware
+                content = content.replace(placeholder, get_token(request).encode())
+                patch_vary_headers(response, ('Cookie',))
+            response.content = content
+            return response
+        return None
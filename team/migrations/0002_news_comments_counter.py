@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:21
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_comments_count(apps, schema_editor):
+    News = apps.get_model('team', 'News')
+    counts = News.objects.annotate(
+        approved=Count('comments', filter=Q(comments__is_approved=True))
+    ).values_list('pk', 'approved')
+    for pk, approved in counts:
+        News.objects.filter(pk=pk).update(approved_comments_count=approved)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='newscomment',
+            options={'ordering': ['created_at', 'id'], 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='approved_comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AddIndex(
+            model_name='newscomment',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['news', 'created_at', 'id'], name='newscomment_approved_idx'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:23
+
+import math
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_news_projection(apps, schema_editor):
+    News = apps.get_model('team', 'News')
+    for news in News.objects.only('pk', 'content').iterator():
+        word_count = len(news.content.split())
+        News.objects.filter(pk=news.pk).update(
+            excerpt=Truncator(news.content.strip()).words(30),
+            word_count=word_count,
+            reading_time=max(1, math.ceil(word_count / 180)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0002_news_comments_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Слов'),
+        ),
+        migrations.RunPython(fill_news_projection, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0003_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveSmallIntegerField(verbose_name='Версия формата')),
+                ('data', models.BinaryField(verbose_name='Данные (JSON, zlib)')),
+                ('created_at', models.DateTimeField(auto_now=True, verbose_name='Создан')),
+                ('season', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='team.season', verbose_name='Сезон')),
+            ],
+            options={
+                'verbose_name': 'Архив сезона',
+                'verbose_name_plural': 'Архивы сезонов',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0004_season_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguestanding',
+            name='balls_lost',
+            field=models.PositiveIntegerField(default=0, verbose_name='Мячи-'),
+        ),
+        migrations.AddField(
+            model_name='leaguestanding',
+            name='balls_won',
+            field=models.PositiveIntegerField(default=0, verbose_name='Мячи+'),
+        ),
+        migrations.CreateModel(
+            name='LeagueFixture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(blank=True, null=True, verbose_name='Дата и время')),
+                ('home_team', models.CharField(max_length=100, verbose_name='Хозяева')),
+                ('away_team', models.CharField(max_length=100, verbose_name='Гости')),
+                ('sets_home', models.PositiveSmallIntegerField(default=0, verbose_name='Сеты (хозяева)')),
+                ('sets_away', models.PositiveSmallIntegerField(default=0, verbose_name='Сеты (гости)')),
+                ('balls_home', models.PositiveIntegerField(default=0, verbose_name='Мячи (хозяева)')),
+                ('balls_away', models.PositiveIntegerField(default=0, verbose_name='Мячи (гости)')),
+                ('match', models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fixture', to='team.match', verbose_name='Наш матч')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fixtures', to='team.season', verbose_name='Сезон')),
+            ],
+            options={
+                'verbose_name': 'Игра лиги',
+                'verbose_name_plural': 'Календарь лиги',
+                'ordering': ['season', 'date', 'id'],
+                'indexes': [models.Index(fields=['season', 'home_team'], name='fixture_home_idx'), models.Index(fields=['season', 'away_team'], name='fixture_away_idx')],
+            },
+        ),
+    ]
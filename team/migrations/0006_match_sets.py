@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+def fill_match_points(apps, schema_editor):
+    # Те же правила, что в Match.calculate_points: 3:0/3:1 — 3, 3:2 — 2, 2:3 — 1
+    Match = apps.get_model('team', 'Match')
+    won = Q(sets_home__gt=F('sets_away'))
+    Match.objects.filter(won, sets_away__lte=1).update(points=3)
+    Match.objects.filter(won, sets_away__gt=1).update(points=2)
+    Match.objects.filter(sets_home=2, sets_away__gte=2).update(points=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0005_league_fixtures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='balls_away',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Мячи (Соперник)'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='balls_home',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Мячи (ИСКРА)'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='points',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Очки'),
+        ),
+        migrations.CreateModel(
+            name='MatchSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(verbose_name='Партия')),
+                ('home', models.PositiveSmallIntegerField(verbose_name='ИСКРА')),
+                ('away', models.PositiveSmallIntegerField(verbose_name='Соперник')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sets', to='team.match', verbose_name='Матч')),
+            ],
+            options={
+                'verbose_name': 'Партия',
+                'verbose_name_plural': 'Партии',
+                'ordering': ['match', 'number'],
+                'constraints': [models.UniqueConstraint(fields=('match', 'number'), name='matchset_unique_number')],
+            },
+        ),
+        migrations.RunPython(fill_match_points, migrations.RunPython.noop),
+    ]
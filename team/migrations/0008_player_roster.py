@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+def retire_duplicate_numbers(apps, schema_editor):
+    # Номер в составе теперь уникален: из игроков с одним номером в составе
+    # остаётся добавленный первым, остальные переводятся в бывшие
+    Player = apps.get_model('team', 'Player')
+    seen = set()
+    duplicates = []
+    for pk, number in Player.objects.order_by('number', 'id').values_list('pk', 'number'):
+        if number in seen:
+            duplicates.append(pk)
+        seen.add(number)
+    Player.objects.filter(pk__in=duplicates).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0007_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='player',
+            options={'ordering': ['number', 'id'], 'verbose_name': 'Игрок', 'verbose_name_plural': 'Игроки'},
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='В составе'),
+        ),
+        migrations.RunPython(retire_duplicate_numbers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('number',), name='player_active_number_unique'),
+        ),
+    ]
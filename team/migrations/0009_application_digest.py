@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_application_keys(apps, schema_editor):
+    # Те же правила, что в PlayerApplication.normalize_phone/normalize_email.
+    # Старые заявки уже отправлены тренеру письмом — в сводку они не попадают.
+    PlayerApplication = apps.get_model('team', 'PlayerApplication')
+    applications = list(PlayerApplication.objects.all())
+    for application in applications:
+        digits = ''.join(char for char in application.phone if char.isdigit())
+        if len(digits) == 11 and digits[0] == '8':
+            digits = '7' + digits[1:]
+        elif len(digits) == 10:
+            digits = '7' + digits
+        application.phone_key = digits
+        application.email_key = application.email.strip().lower()
+    PlayerApplication.objects.bulk_update(applications, ['phone_key', 'email_key'], batch_size=500)
+    PlayerApplication.objects.update(notified_at=F('submitted_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0008_player_roster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerapplication',
+            name='email_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='playerapplication',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Отправлена тренеру'),
+        ),
+        migrations.AddField(
+            model_name='playerapplication',
+            name='phone_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='playerapplication',
+            name='repeats',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Повторных отправок'),
+        ),
+        migrations.AddIndex(
+            model_name='playerapplication',
+            index=models.Index(fields=['notified_at', 'submitted_at'], name='application_digest_idx'),
+        ),
+        migrations.RunPython(fill_application_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:00
+
+import math
+
+from django.db import migrations, models
+
+OUR_TEAM = 'ИСКРА'
+
+
+def _points(own, other):
+    # Те же правила и тай-брейки, что в team/standings.py: 3:0/3:1 — 3, 3:2 — 2, 2:3 — 1
+    if own > other:
+        return 3 if other <= 1 else 2
+    return 1 if own == 2 else 0
+
+
+def _ratio(won, lost):
+    if lost:
+        return won / lost
+    return math.inf if won else 0
+
+
+def backfill_fixtures(apps, schema_editor):
+    """Наши матчи — в календарь лиги; ручные таблицы остаются ручными"""
+    Match = apps.get_model('team', 'Match')
+    Season = apps.get_model('team', 'Season')
+    LeagueFixture = apps.get_model('team', 'LeagueFixture')
+    LeagueStanding = apps.get_model('team', 'LeagueStanding')
+
+    fixtures = []
+    for match in Match.objects.filter(fixture__isnull=True).select_related('opponent'):
+        ours = (match.sets_home, match.sets_away, match.balls_home, match.balls_away)
+        theirs = (match.sets_away, match.sets_home, match.balls_away, match.balls_home)
+        home, away = (OUR_TEAM, match.opponent.name) if match.is_home else (match.opponent.name, OUR_TEAM)
+        sets_home, sets_away, balls_home, balls_away = ours if match.is_home else theirs
+        fixtures.append(LeagueFixture(
+            season_id=match.season_id, match=match, date=match.date, home_team=home, away_team=away,
+            sets_home=sets_home, sets_away=sets_away, balls_home=balls_home, balls_away=balls_away,
+        ))
+    LeagueFixture.objects.bulk_create(fixtures, batch_size=500)
+
+    # Сезон с введённой вручную таблицей: в календаре только наши матчи, пересчёт её бы обрезал
+    manual = set(LeagueStanding.objects.values_list('season_id', flat=True))
+    Season.objects.filter(pk__in=manual).update(standings_from_fixtures=False)
+
+    # Остальным сезонам таблица строится из календаря сразу
+    for season_id in Season.objects.exclude(pk__in=manual).values_list('pk', flat=True):
+        totals = {}
+        played = LeagueFixture.objects.filter(season_id=season_id).exclude(sets_home=0, sets_away=0)
+        for fixture in played:
+            for team, own, other, balls_own, balls_other in (
+                (fixture.home_team, fixture.sets_home, fixture.sets_away, fixture.balls_home, fixture.balls_away),
+                (fixture.away_team, fixture.sets_away, fixture.sets_home, fixture.balls_away, fixture.balls_home),
+            ):
+                row = totals.setdefault(team, LeagueStanding(season_id=season_id, team_name=team, position=0))
+                row.played += 1
+                row.wins += own > other
+                row.losses += own < other
+                row.sets_won += own
+                row.sets_lost += other
+                row.balls_won += balls_own
+                row.balls_lost += balls_other
+                row.points += _points(own, other)
+        rows = sorted(totals.values(), key=lambda row: (
+            -row.points, -row.wins,
+            -_ratio(row.sets_won, row.sets_lost), -_ratio(row.balls_won, row.balls_lost), row.team_name,
+        ))
+        for position, row in enumerate(rows, start=1):
+            row.position = position
+        LeagueStanding.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0009_application_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='standings_from_fixtures',
+            field=models.BooleanField(default=True, help_text='Выключено — турнирная таблица сезона ведётся вручную и не пересчитывается', verbose_name='Таблица по календарю лиги'),
+        ),
+        migrations.RunPython(backfill_fixtures, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 16:20
+
+from django.db import migrations
+
+
+def fix_two_all_points(apps, schema_editor):
+    # 0006 не давал очко за 2:2, а Match.calculate_points даёт (как за 2:3)
+    Match = apps.get_model('team', 'Match')
+    Match.objects.filter(sets_home=2, sets_away=2).update(points=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0010_legacy_standings'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_two_all_points, migrations.RunPython.noop),
+    ]
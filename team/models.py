@@ -1,4 +1,18 @@
-from django.db import models
+import json
+import math
+import zlib
+
+from django.db import models, transaction
+from django.db.models.functions import Cast, Concat
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from .caching import get_or_compute
+
+EXCERPT_WORDS = 30
+WORDS_PER_MINUTE = 180
+# Как наша команда записана в турнирной таблице и календаре лиги
+OUR_TEAM = 'ИСКРА'
 
 
 class Player(models.Model):
@@ -15,10 +29,18 @@ class Player(models.Model):
     number = models.PositiveSmallIntegerField('Номер')
     photo = models.ImageField('Фото', upload_to='players/', blank=True, null=True)
     bio = models.TextField('Описание', blank=True)
+    is_active = models.BooleanField('В составе', default=True)
 
     class Meta:
         verbose_name = 'Игрок'
         verbose_name_plural = 'Игроки'
+        ordering = ['number', 'id']
+        constraints = [
+            # Номер уникален в действующем составе; частичный индекс заодно служит поиску по номеру
+            models.UniqueConstraint(
+                fields=['number'], condition=models.Q(is_active=True), name='player_active_number_unique',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} (№{self.number})"
@@ -28,6 +50,12 @@ class Player(models.Model):
 class Season(models.Model):
     name = models.CharField('Название сезона', max_length=100, help_text='Например: 2024/2025')
     is_active = models.BooleanField('Текущий сезон', default=True)
+    # Сезоны, чья таблица заполнялась вручную, движок не трогает, пока в
+    # календарь не внесены все игры лиги и флаг не включён в админке
+    standings_from_fixtures = models.BooleanField(
+        'Таблица по календарю лиги', default=True,
+        help_text='Выключено — турнирная таблица сезона ведётся вручную и не пересчитывается',
+    )
 
     class Meta:
         verbose_name = 'Сезон'
@@ -36,6 +64,11 @@ class Season(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_active(cls):
+        """Текущий сезон (кэшируется до изменения любого сезона)"""
+        return get_or_compute('seasons', 'active', lambda: cls.objects.filter(is_active=True).first())
+
 
 # ===== КОМАНДА-СОПЕРНИК (для таблицы) =====
 class Opponent(models.Model):
@@ -50,6 +83,21 @@ class Opponent(models.Model):
         return self.name
 
 
+class MatchQuerySet(models.QuerySet):
+    def with_outcome(self):
+        """Счёт, победа и очки матча в аннотациях (для values()-проекций и агрегатов)"""
+        won = models.Q(sets_home__gt=models.F('sets_away'))
+        return self.annotate(
+            outcome_result=Concat(
+                Cast('sets_home', models.CharField()), models.Value(':'), Cast('sets_away', models.CharField()),
+                output_field=models.CharField(),
+            ),
+            outcome_is_win=models.ExpressionWrapper(won, output_field=models.BooleanField()),
+            # Очки хранятся в Match (считаются при сохранении)
+            outcome_points=models.F('points'),
+        )
+
+
 # ===== ОБНОВЛЯЕМ Match — привязываем к сезону и сопернику =====
 # Удали старую модель Match и замени на эту:
 class Match(models.Model):
@@ -61,9 +109,15 @@ class Match(models.Model):
     # Счёт по сетам: "3:1", "2:3" и т.д.
     sets_home = models.PositiveSmallIntegerField('Сеты (ИСКРА)', default=0)
     sets_away = models.PositiveSmallIntegerField('Сеты (Соперник)', default=0)
+    # Считаются при сохранении (очки — из сетов, мячи — из партий MatchSet)
+    points = models.PositiveSmallIntegerField('Очки', default=0, editable=False)
+    balls_home = models.PositiveIntegerField('Мячи (ИСКРА)', default=0, editable=False)
+    balls_away = models.PositiveIntegerField('Мячи (Соперник)', default=0, editable=False)
 
     # Дополнительно: можно добавить video_url, report_text и т.д.
 
+    objects = MatchQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Матч'
         verbose_name_plural = 'Матчи'
@@ -72,6 +126,13 @@ class Match(models.Model):
     def __str__(self):
         return f"{self.opponent} — {self.date.strftime('%d.%m.%Y')}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходный сезон: после переноса матча кэш и архив прежнего сезона тоже сбрасываются
+        instance._loaded_season_id = instance.__dict__.get('season_id')
+        return instance
+
     @property
     def result(self):
         return f"{self.sets_home}:{self.sets_away}"
@@ -80,22 +141,70 @@ class Match(models.Model):
     def is_win(self):
         return self.sets_home > self.sets_away
 
-    @property
-    def points(self):
+    @staticmethod
+    def calculate_points(sets_home, sets_away):
         # 3 очка за победу 3:0 или 3:1, 2 за 3:2, 1 за 2:3, 0 за поражение
-        if not (self.sets_home + self.sets_away):
+        if not (sets_home + sets_away):
             return 0
-        if self.is_win:
-            if self.sets_away <= 1:
+        if sets_home > sets_away:
+            if sets_away <= 1:
                 return 3
             else:
                 return 2
         else:
-            if self.sets_home == 2:
+            if sets_home == 2:
                 return 1
             else:
                 return 0
 
+    def save(self, *args, **kwargs):
+        self.points = self.calculate_points(self.sets_home, self.sets_away)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'sets_home', 'sets_away'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'points'}
+        super().save(*args, **kwargs)
+
+    def apply_sets(self, sets):
+        """Переносит итоги партий в денормализованные поля матча (без сохранения)"""
+        if sets:
+            self.sets_home = sum(1 for match_set in sets if match_set.home > match_set.away)
+            self.sets_away = sum(1 for match_set in sets if match_set.away > match_set.home)
+        self.balls_home = sum(match_set.home for match_set in sets)
+        self.balls_away = sum(match_set.away for match_set in sets)
+
+    def save_sets(self, scores):
+        """Записывает счёт партий одной пачкой: [(25, 23), (18, 25), ...]"""
+        with transaction.atomic():
+            self.sets.all().delete()
+            sets = MatchSet.objects.bulk_create([
+                MatchSet(match=self, number=number, home=home, away=away)
+                for number, (home, away) in enumerate(scores, start=1)
+            ])
+            self.apply_sets(sets)
+            self.save(update_fields=['sets_home', 'sets_away', 'balls_home', 'balls_away'])
+        return sets
+
+
+# ===== СЧЁТ ПО ПАРТИЯМ =====
+# Отдельная таблица только для деталей матча и соотношения мячей;
+# списки читают денормализованные sets_home/sets_away/points из Match.
+class MatchSet(models.Model):
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, verbose_name='Матч', related_name='sets')
+    number = models.PositiveSmallIntegerField('Партия')
+    home = models.PositiveSmallIntegerField('ИСКРА')
+    away = models.PositiveSmallIntegerField('Соперник')
+
+    class Meta:
+        verbose_name = 'Партия'
+        verbose_name_plural = 'Партии'
+        ordering = ['match', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'number'], name='matchset_unique_number'),
+        ]
+
+    def __str__(self):
+        return f"{self.number}-я партия {self.home}:{self.away}"
+
 
 # ===== СТАТИСТИКА ИГРОКА ЗА МАТЧ =====
 class PlayerMatchStat(models.Model):
@@ -122,6 +231,12 @@ class News(models.Model):
     content = models.TextField('Текст новости')
     cover = models.ImageField('Обложка', upload_to='news/', blank=True, null=True)
     created_at = models.DateTimeField('Дата публикации', auto_now_add=True)
+    # Денормализованный счётчик одобренных комментариев (для списков без COUNT по каждой новости)
+    approved_comments_count = models.PositiveIntegerField('Комментариев', default=0, editable=False)
+    # Проекция для списков и RSS: считается при сохранении, чтобы не тянуть content
+    excerpt = models.TextField('Анонс', blank=True, editable=False)
+    word_count = models.PositiveIntegerField('Слов', default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField('Время чтения, мин', default=1, editable=False)
 
     class Meta:
         verbose_name = 'Новость'
@@ -131,12 +246,33 @@ class News(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходный адрес: после смены slug статический экспорт убирает старую страницу
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             from django.utils.text import slugify
             self.slug = slugify(self.title)[:50]
+        # Разметку, вставленную в текст, в анонс и подсчёт слов не берём
+        text = strip_tags(self.content).strip()
+        self.excerpt = Truncator(text).words(EXCERPT_WORDS)
+        self.word_count = len(text.split())
+        self.reading_time = max(1, math.ceil(self.word_count / WORDS_PER_MINUTE))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt', 'word_count', 'reading_time'}
         super().save(*args, **kwargs)
 
+    @classmethod
+    def refresh_comments_count(cls, news_id):
+        """Пересчитывает счётчик одобренных комментариев одной новости"""
+        count = NewsComment.objects.filter(news_id=news_id, is_approved=True).count()
+        cls.objects.filter(pk=news_id).update(approved_comments_count=count)
+
 
 # ===== АЛЬБОМЫ ДЛЯ ГАЛЕРЕИ =====
 class Album(models.Model):
@@ -159,6 +295,12 @@ class Photo(models.Model):
     image = models.ImageField('Фото', upload_to='gallery/')
     caption = models.CharField('Подпись', max_length=200, blank=True)
     uploaded_at = models.DateTimeField('Загружено', auto_now_add=True)
+    # Считаются один раз при загрузке (team/images.py): страница альбома
+    # не читает оригиналы, а резервирует место и показывает заглушку сразу
+    width = models.PositiveIntegerField('Ширина', null=True, editable=False)
+    height = models.PositiveIntegerField('Высота', null=True, editable=False)
+    placeholder = models.TextField('Заглушка (data URI)', blank=True, editable=False)
+    renditions = models.JSONField('Уменьшенные копии', default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Фотография'
@@ -168,6 +310,44 @@ class Photo(models.Model):
     def __str__(self):
         return f"{self.album} — {self.caption or 'Фото'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.image and (self.image.name != getattr(self, '_loaded_image', None) or not self.placeholder):
+            self.process_image()
+        self._loaded_image = self.image.name
+
+    def process_image(self):
+        """Размеры, заглушка и рендеры; для уже обработанного файла берутся у другой фотографии"""
+        from .images import build_photo_fields
+
+        fields = (
+            Photo.objects.filter(image=self.image.name).exclude(pk=self.pk).exclude(placeholder='')
+            .values('width', 'height', 'placeholder', 'renditions').first()
+        ) or build_photo_fields(self.image)
+        if fields:
+            Photo.objects.filter(pk=self.pk).update(**fields)
+            for field, value in fields.items():
+                setattr(self, field, value)
+
+    @property
+    def src(self):
+        """Основной src: средняя копия, если есть, иначе оригинал"""
+        name = self.renditions.get('640') or self.image.name
+        return self.image.storage.url(name)
+
+    @property
+    def srcset(self):
+        urls = [f'{self.image.storage.url(name)} {width}w' for width, name in self.renditions.items()]
+        if self.width:
+            urls.append(f'{self.image.url} {self.width}w')
+        return ', '.join(urls)
+
 
 class PlayerApplication(models.Model):
     POSITION_CHOICES = Player.POSITION_CHOICES  # берём из Player
@@ -179,14 +359,45 @@ class PlayerApplication(models.Model):
     phone = models.CharField('Телефон', max_length=20)
     email = models.EmailField('Email', blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
+    # Ключи поиска повторных заявок (заполняются в save)
+    phone_key = models.CharField(max_length=20, editable=False, db_index=True, default='')
+    email_key = models.CharField(max_length=254, editable=False, db_index=True, default='')
+    repeats = models.PositiveIntegerField('Повторных отправок', default=0, editable=False)
+    # Пока пусто — заявка ждёт очередной сводки тренеру (send_application_digest)
+    notified_at = models.DateTimeField('Отправлена тренеру', null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Заявка на вступление'
         verbose_name_plural = 'Заявки'
+        indexes = [
+            models.Index(fields=['notified_at', 'submitted_at'], name='application_digest_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.position})"
 
+    @staticmethod
+    def normalize_phone(phone):
+        # +7 (900) 123-45-67, 8 900 123 45 67 и 9001234567 — один номер
+        digits = ''.join(char for char in phone if char.isdigit())
+        if len(digits) == 11 and digits[0] == '8':
+            digits = '7' + digits[1:]
+        elif len(digits) == 10:
+            digits = '7' + digits
+        return digits
+
+    @staticmethod
+    def normalize_email(email):
+        return email.strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.phone_key = self.normalize_phone(self.phone)
+        self.email_key = self.normalize_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'phone', 'email'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'phone_key', 'email_key'}
+        super().save(*args, **kwargs)
+
 
 # ===== КОММЕНТАРИИ К НОВОСТЯМ =====
 class NewsComment(models.Model):
@@ -200,7 +411,15 @@ class NewsComment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ['created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Лента одобренных комментариев новости: фильтр + keyset-сортировка по одному индексу
+            models.Index(
+                fields=['news', 'created_at', 'id'],
+                condition=models.Q(is_approved=True),
+                name='newscomment_approved_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Комментарий от {self.author_name} к {self.news.title}"
@@ -215,6 +434,8 @@ class LeagueStanding(models.Model):
     losses = models.PositiveSmallIntegerField('П', default=0)
     sets_won = models.PositiveSmallIntegerField('Сеты+', default=0)
     sets_lost = models.PositiveSmallIntegerField('Сеты-', default=0)
+    balls_won = models.PositiveIntegerField('Мячи+', default=0)
+    balls_lost = models.PositiveIntegerField('Мячи-', default=0)
     points = models.PositiveSmallIntegerField('Очки', default=0)
 
     class Meta:
@@ -224,3 +445,70 @@ class LeagueStanding(models.Model):
 
     def __str__(self):
         return f"{self.position}. {self.team_name} — {self.points} очков"
+
+
+# ===== КАЛЕНДАРЬ ЛИГИ =====
+# Все игры лиги, не только наши. Из сыгранных игр считается LeagueStanding
+# (team/standings.py); наши матчи попадают сюда автоматически из Match.
+class LeagueFixture(models.Model):
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, verbose_name='Сезон', related_name='fixtures')
+    date = models.DateTimeField('Дата и время', null=True, blank=True)
+    home_team = models.CharField('Хозяева', max_length=100)
+    away_team = models.CharField('Гости', max_length=100)
+    sets_home = models.PositiveSmallIntegerField('Сеты (хозяева)', default=0)
+    sets_away = models.PositiveSmallIntegerField('Сеты (гости)', default=0)
+    balls_home = models.PositiveIntegerField('Мячи (хозяева)', default=0)
+    balls_away = models.PositiveIntegerField('Мячи (гости)', default=0)
+    match = models.OneToOneField(
+        Match, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        verbose_name='Наш матч', related_name='fixture',
+    )
+
+    class Meta:
+        verbose_name = 'Игра лиги'
+        verbose_name_plural = 'Календарь лиги'
+        ordering = ['season', 'date', 'id']
+        indexes = [
+            # Пересчёт таблицы выбирает игры конкретных команд сезона
+            models.Index(fields=['season', 'home_team'], name='fixture_home_idx'),
+            models.Index(fields=['season', 'away_team'], name='fixture_away_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.home_team} — {self.away_team} {self.sets_home}:{self.sets_away}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходные команды: после переименования старую строку таблицы тоже пересчитываем
+        instance._loaded_teams = (instance.__dict__.get('season_id'), {
+            instance.__dict__.get('home_team'), instance.__dict__.get('away_team'),
+        })
+        return instance
+
+    @property
+    def is_played(self):
+        return self.sets_home + self.sets_away > 0
+
+
+# ===== АРХИВ СЕЗОНА =====
+class SeasonSnapshot(models.Model):
+    season = models.OneToOneField(Season, on_delete=models.CASCADE, verbose_name='Сезон', related_name='snapshot')
+    version = models.PositiveSmallIntegerField('Версия формата')
+    data = models.BinaryField('Данные (JSON, zlib)')
+    created_at = models.DateTimeField('Создан', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Архив сезона'
+        verbose_name_plural = 'Архивы сезонов'
+
+    def __str__(self):
+        return f"Архив {self.season}"
+
+    @property
+    def json(self):
+        """Готовый JSON (байты) — можно отдавать как есть"""
+        return zlib.decompress(self.data)
+
+    def load(self):
+        return json.loads(self.json)
@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import get_or_compute
+
+
+# ===== KEYSET-ПАГИНАЦИЯ =====
+# Курсор — это значения полей сортировки последней показанной строки.
+# Следующая порция выбирается условием «строго после курсора» по индексу,
+# без OFFSET и без COUNT(*), поэтому стоимость не растёт с номером страницы.
+
+# Фото альбома и комментарии новости: страница и подгрузка через API должны
+# отдавать порции одного размера
+PHOTOS_PER_PAGE = 12
+COMMENTS_PER_PAGE = 20
+
+
+def _cursor_value(value):
+    # isoformat сохраняет микросекунды (DjangoJSONEncoder их обрезает)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(obj, ordering):
+    """Кодирует значения полей сортировки объекта в строку для URL"""
+    values = [_cursor_value(getattr(obj, field.lstrip('-'))) for field in ordering]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(model, cursor, ordering):
+    """Разбирает курсор обратно в значения полей; None, если курсор битый"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def keyset_filter(ordering, values):
+    """Q-условие «строго после курсора» для заданной сортировки"""
+    # ('-created_at', '-id') -> created_at < c OR (created_at = c AND id < i)
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=20):
+    """Возвращает (объекты порции, курсор следующей порции или None)"""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(queryset.model, cursor, ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+
+    # Берём на одну строку больше — так узнаём, есть ли продолжение
+    items = list(queryset[:limit + 1])
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1], ordering)
+    return items, None
+
+
+# ===== PAGINATOR С КЭШИРОВАННЫМ COUNT =====
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт COUNT(*) из кэша текущего поколения раздела"""
+
+    def __init__(self, object_list, per_page, namespace, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.namespace = namespace
+
+    @cached_property
+    def count(self):
+        query = str(self.object_list.query).encode()
+        key = 'count:' + hashlib.md5(query).hexdigest()
+        return get_or_compute(self.namespace, key, lambda: Paginator.count.func(self))
+
+
+# ===== KEYSET-PAGINATOR ДЛЯ ШАБЛОНОВ =====
+# Тот же интерфейс, что у Django Paginator (has_next, num_pages, number, ...),
+# но соседние страницы выбираются по курсору (?after= / ?before=) без OFFSET,
+# а дальние — с того конца списка, к которому они ближе.
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+class KeysetPage(Page):
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1], self.paginator.ordering) if self.object_list else ''
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0], self.paginator.ordering) if self.object_list else ''
+
+    @property
+    def vary_key(self):
+        """Ключ содержимого страницы для fragment_cache: номер страницы его не определяет"""
+        return ','.join(str(obj.pk) for obj in self.object_list)
+
+
+class KeysetPaginator(CachedCountPaginator):
+    def __init__(self, object_list, per_page, namespace, ordering, **kwargs):
+        super().__init__(object_list, per_page, namespace, **kwargs)
+        self.ordering = tuple(ordering)
+
+    def page(self, number, after=None, before=None):
+        number = self.validate_number(number)
+        items = None
+        # Курсор принимаем, только если он стоит ровно на границе страницы number:
+        # перед after — (number - 1) * per_page - 1 строк, перед before — number * per_page.
+        # Устаревшая закладка или чужой номер (?page=5&after=<середина>) — выбираем по номеру
+        if after:
+            values = decode_cursor(self.object_list.model, after, self.ordering)
+            if values is not None and self._rank(values) == (number - 1) * self.per_page - 1:
+                items = self._slice_from_cursor(values, self.ordering)
+        elif before:
+            values = decode_cursor(self.object_list.model, before, self.ordering)
+            if values is not None and self._rank(values) == number * self.per_page:
+                items = self._slice_from_cursor(values, _reverse_ordering(self.ordering))[::-1]
+        if not items:
+            items = self._slice_by_number(number)
+        return self._get_page(items, number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetPage(*args, **kwargs)
+
+    def _rank(self, values):
+        """Сколько строк стоит строго перед курсором; кэшируется, как и count"""
+        before = self.object_list.filter(keyset_filter(_reverse_ordering(self.ordering), values))
+        query = str(before.query).encode()
+        key = 'rank:' + hashlib.md5(query).hexdigest()
+        return get_or_compute(self.namespace, key, before.count)
+
+    def _slice_from_cursor(self, values, ordering):
+        queryset = self.object_list.filter(keyset_filter(ordering, values)).order_by(*ordering)
+        return list(queryset[:self.per_page])
+
+    def _slice_by_number(self, number):
+        bottom = (number - 1) * self.per_page
+        top = min(bottom + self.per_page, self.count)
+        if bottom > self.count // 2:
+            # Вторая половина архива (в т.ч. «Последняя »») — читаем с конца, OFFSET меньше
+            offset = self.count - top
+            queryset = self.object_list.order_by(*_reverse_ordering(self.ordering))
+            return list(queryset[offset:offset + top - bottom])[::-1]
+        return list(self.object_list.order_by(*self.ordering)[bottom:top])
+
+
+def paginate(request, queryset, per_page, namespace, ordering):
+    """Страница по параметрам запроса: ?page=N и необязательный курсор ?after= / ?before="""
+    paginator = KeysetPaginator(queryset, per_page, namespace=namespace, ordering=ordering)
+    try:
+        number = paginator.validate_number(request.GET.get('page'))
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
+    return paginator.page(number, after=request.GET.get('after'), before=request.GET.get('before'))
@@ -0,0 +1,166 @@
+import cProfile
+import io
+import logging
+import pstats
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from .ratelimit import is_rate_limited
+
+logger = logging.getLogger(__name__)
+
+
+# ===== ПРОФИЛИ ЗАПРОСОВ =====
+# Медленную страницу в продакшене можно снять прямо там: сотрудник с
+# подписанным токеном (страница /admin/profiles/ в team/admin.py) добавляет
+# ?_profile=<токен> или заголовок X-Profile — запрос выполняется под cProfile с журналом SQL,
+# отчёт ложится в кэш на PROFILE_TTL. Не чаще RATELIMITS['profile'] на сотрудника.
+# Без токена ProfilingMiddleware только ищет подстроку в строке запроса.
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_SALT = 'team.profiling'
+
+INDEX_KEY = 'profile:index'
+INDEX_LOCK_KEY = 'profile:index:lock'
+SUMMARY_FIELDS = ('id', 'method', 'path', 'user', 'status', 'created_at', 'duration_ms', 'sql_ms')
+# Отчётов в списке и строк статистики cProfile в отчёте
+PROFILE_KEEP = 50
+PROFILE_TOP = 40
+
+
+def make_token(user):
+    """Токен профилирования сотрудника (действует PROFILE_TOKEN_MAX_AGE секунд)"""
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign(str(user.pk))
+
+
+def requested_token(request):
+    """Токен из запроса или None — без разбора GET, если параметра точно нет"""
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        return token
+    if PROFILE_PARAM in request.META.get('QUERY_STRING', ''):
+        return request.GET.get(PROFILE_PARAM)
+    return None
+
+
+def profiling_allowed(request, token):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return False
+    try:
+        user_id = signing.TimestampSigner(salt=PROFILE_SALT).unsign(token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    # Лимит на сотрудника, а не на адрес: за общим NAT офиса их несколько
+    return user_id == str(user.pk) and not is_rate_limited(request, 'profile', key=f'user:{user.pk}')
+
+
+def _sql_logger(queries):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'ms': round((time.perf_counter() - start) * 1000, 2),
+            })
+    return wrapper
+
+
+def profile_request(request, get_response):
+    """Выполняет запрос под cProfile с журналом SQL и сохраняет отчёт.
+
+    Потоковые ответы дочитываются уже после профилирования: в отчёт попадает
+    только работа представления.
+    """
+    queries = []
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_sql_logger(queries)))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = (time.perf_counter() - start) * 1000
+
+    report_id = uuid.uuid4().hex[:12]
+    save_report(report_id, {
+        'id': report_id,
+        'method': request.method,
+        'path': request.path,
+        'user': request.user.get_username(),
+        'status': response.status_code,
+        'created_at': timezone.now(),
+        'duration_ms': round(duration, 1),
+        'sql_ms': round(sum(query['ms'] for query in queries), 1),
+        'queries': queries,
+        # Один и тот же SQL много раз подряд — обычно N+1
+        'repeated': [(sql, count) for sql, count in Counter(q['sql'] for q in queries).most_common(5) if count > 1],
+        'stats': _stats_text(profiler),
+    })
+    response.headers['X-Profile-Id'] = report_id
+    return response
+
+
+def _stats_text(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_TOP)
+    return stream.getvalue()
+
+
+def _summary(report):
+    summary = {key: report[key] for key in SUMMARY_FIELDS}
+    summary['query_count'] = len(report['queries'])
+    return summary
+
+
+def save_report(report_id, report):
+    try:
+        cache.set(f'profile:{report_id}', report, settings.PROFILE_TTL)
+        # Список читается и перезаписывается целиком — под блокировкой, иначе
+        # два отчёта, сохранённые одновременно, затрут друг друга
+        for _ in range(20):
+            if cache.add(INDEX_LOCK_KEY, 1, 5):
+                break
+            time.sleep(0.05)
+        else:
+            # Блокировку держат слишком долго: отчёт доступен по X-Profile-Id, но в список не попадёт
+            logger.warning('Отчёт профилирования %s не добавлен в список', report_id)
+            return
+        try:
+            index = [_summary(report), *(cache.get(INDEX_KEY) or [])][:PROFILE_KEEP]
+            cache.set(INDEX_KEY, index, settings.PROFILE_TTL)
+        finally:
+            cache.delete(INDEX_LOCK_KEY)
+    except Exception:
+        logger.warning('Отчёт профилирования %s не сохранён', report_id, exc_info=True)
+
+
+def recent_reports():
+    """Краткие сведения о последних отчётах, новые первыми"""
+    try:
+        return cache.get(INDEX_KEY) or []
+    except Exception:
+        return []
+
+
+def get_report(report_id):
+    try:
+        return cache.get(f'profile:{report_id}')
+    except Exception:
+        return None
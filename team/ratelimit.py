@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# ===== ОГРАНИЧЕНИЕ ЧАСТОТЫ ЗАПРОСОВ =====
+# Скользящее окно на двух счётчиках фиксированных окон: текущее окно
+# считается целиком, предыдущее — с весом оставшейся в нём доли времени.
+# На запрос — incr + get в Redis (incr атомарен), без списков отметок времени.
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60)"""
+    count, period = rate.split('/')
+    return int(count), RATE_PERIODS[period[0].lower()]
+
+
+def client_ip(request):
+    """Адрес клиента с учётом TRUSTED_PROXY_COUNT доверенных прокси перед приложением.
+
+    Левые адреса в X-Forwarded-For клиент может прислать сам — берём тот,
+    что дописал самый дальний из наших прокси (N-й справа).
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class _LocalCounters:
+    """Запасные счётчики в памяти процесса — если Redis недоступен"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._data) > self.MAX_KEYS:
+                self._data = {k: v for k, v in self._data.items() if v[1] > now}
+            count, expires = self._data.get(key, (0, now + timeout))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self._data[key] = (count + 1, expires)
+            return count + 1
+
+    def get(self, key):
+        with self._lock:
+            count, expires = self._data.get(key, (0, 0))
+        return count if expires > time.monotonic() else 0
+
+
+_local = _LocalCounters()
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключа ещё нет; add атомарен, при гонке просто повторяем incr
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(key, limit, period):
+    """Учитывает попытку; True, если она укладывается в лимит"""
+    now = time.time()
+    window = int(now // period)
+    current_key = f'rl:{key}:{window}'
+    previous_key = f'rl:{key}:{window - 1}'
+    try:
+        current = _incr(current_key, period * 2)
+        previous = cache.get(previous_key, 0)
+    except Exception:
+        current = _local.incr(current_key, period * 2)
+        previous = _local.get(previous_key)
+
+    elapsed = (now % period) / period
+    return previous * (1 - elapsed) + current <= limit
+
+
+def is_rate_limited(request, scope, key=None):
+    """True, если клиент превысил лимит RATELIMITS[scope] (попытка учитывается).
+
+    key — кого ограничивать; по умолчанию адрес клиента.
+    """
+    rate = settings.RATELIMITS.get(scope)
+    if not rate:
+        return False
+    limit, period = parse_rate(rate)
+    return not hit(f'{scope}:{key or client_ip(request)}', limit, period)
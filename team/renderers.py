@@ -0,0 +1,42 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # без orjson — обычный json из стандартной библиотеки
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson (если установлен); вывод совпадает с компактным DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Отступы нужны только браузерному API — там скорость не важна
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Даты и прочие нестандартные типы — через кодировщик DRF, как у json.dumps
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class StreamingJSONRenderer(FastJSONRenderer):
+    """Рендерер, умеющий отдавать список по частям (см. StreamingListMixin)"""
+
+    # Сколько объектов склеивать в один кусок ответа
+    batch_size = 100
+
+    def render_stream(self, items, renderer_context=None):
+        """Генератор байтов JSON-массива из итерируемого набора словарей"""
+        yield b'['
+        batch = []
+        first = True
+        for item in items:
+            batch.append(self.render(item, renderer_context=renderer_context))
+            if len(batch) >= self.batch_size:
+                yield (b'' if first else b',') + b','.join(batch)
+                batch, first = [], False
+        if batch:
+            yield (b'' if first else b',') + b','.join(batch)
+        yield b']'
@@ -0,0 +1,67 @@
+import functools
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+from .caching import get_or_compute
+from .models import Player
+
+
+# ===== СОСТАВ КОМАНДЫ =====
+# Действующий состав, сгруппированный по амплуа (в порядке POSITION_CHOICES)
+# и упорядоченный по номеру. Собирается одним запросом, хранится в кэше
+# до изменения любого игрока (поколение 'players') и несёт свой ETag.
+
+def get_roster():
+    return get_or_compute('players', 'roster', build_roster)
+
+
+def build_roster():
+    storage = Player._meta.get_field('photo').storage
+    rows = Player.objects.filter(is_active=True).order_by('number', 'id').values(
+        'id', 'name', 'number', 'position', 'photo', 'bio',
+    )
+
+    groups = {code: [] for code, _ in Player.POSITION_CHOICES}
+    for row in rows:
+        row['photo'] = storage.url(row['photo']) if row['photo'] else None
+        groups.setdefault(row['position'], []).append(row)
+
+    titles = dict(Player.POSITION_CHOICES)
+    positions = [
+        {'position': code, 'title': titles.get(code, code), 'players': players}
+        for code, players in groups.items() if players
+    ]
+    raw = json.dumps(positions, ensure_ascii=False, sort_keys=True).encode()
+    return {
+        'etag': hashlib.md5(raw).hexdigest(),
+        'count': sum(len(group['players']) for group in positions),
+        'positions': positions,
+    }
+
+
+def roster_etag(request, *args, **kwargs):
+    """etag_func для django.views.decorators.http.condition"""
+    return get_roster()['etag']
+
+
+@functools.cache
+def deploy_version():
+    """Коммит выкладки и манифест статики (имена site.<хэш>.css) одним хэшем"""
+    sha = hashlib.md5(settings.RELEASE.encode())
+    try:
+        with open(os.path.join(settings.STATIC_ROOT, 'staticfiles.json'), 'rb') as f:
+            sha.update(f.read())
+    except OSError:
+        pass
+    return sha.hexdigest()[:12]
+
+
+def players_page_etag(request, *args, **kwargs):
+    """ETag HTML-страницы состава: новый шаблон или статика после деплоя — новый ETag"""
+    if settings.DEBUG:
+        # Шаблоны в разработке меняются без перезапуска
+        return None
+    return f"{get_roster()['etag']}-{deploy_version()}"
@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+
+from django.db import connections
+
+REPLICA = 'replica'
+# Cookie «читать с основной базы» — ставится после изменяющих запросов
+PRIMARY_COOKIE = 'db_primary'
+
+# База для чтения в текущем запросе. По умолчанию — основная: команды,
+# сигналы и всё, что не прошло через ReplicaMiddleware, читают свои же записи.
+_read_db = ContextVar('read_db', default='default')
+
+
+def replica_available():
+    return REPLICA in connections.databases
+
+
+def set_read_db(alias):
+    """Назначает базу для чтения; возвращает токен для reset_read_db()"""
+    return _read_db.set(alias)
+
+
+def reset_read_db(token):
+    _read_db.reset(token)
+
+
+def get_read_db():
+    return _read_db.get()
+
+
+class ReplicaRouter:
+    """Чтение публичных GET-запросов — с реплики, всё остальное — с основной базы"""
+
+    def db_for_read(self, model, **hints):
+        return get_read_db()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,110 @@
+import json
+import zlib
+
+from django.db.models import Count, Sum
+
+from .analytics import outcome_totals, played_matches
+from .caching import bump_generation, get_or_compute
+from .models import LeagueStanding, PlayerMatchStat, SeasonSnapshot
+
+# Увеличить при изменении структуры данных: старые архивы перестанут
+# использоваться и сезон будет считаться заново до повторной архивации
+SNAPSHOT_VERSION = 2
+
+LEADERBOARD_SIZE = 5
+LEADERBOARD_STATS = ('points', 'aces', 'blocks', 'receptions')
+
+
+# ===== ДАННЫЕ СЕЗОНА =====
+def build_season_data(season):
+    """Результаты, таблица и лидеры сезона одним словарём (JSON-совместимым)"""
+    matches = played_matches().filter(season=season).order_by('date', 'id')
+    totals = outcome_totals(matches)
+
+    match_rows = [
+        {
+            'id': row['id'],
+            'date': row['date'].isoformat(),
+            'opponent': row['opponent__name'],
+            'is_home': row['is_home'],
+            'sets_home': row['sets_home'],
+            'sets_away': row['sets_away'],
+            'points': row['outcome_points'],
+            'is_win': row['outcome_is_win'],
+        }
+        for row in matches.values(
+            'id', 'date', 'opponent__name', 'is_home', 'sets_home', 'sets_away', 'outcome_points', 'outcome_is_win'
+        )
+    ]
+
+    standings = list(
+        LeagueStanding.objects.filter(season=season).order_by('position').values(
+            'position', 'team_name', 'played', 'wins', 'losses', 'sets_won', 'sets_lost', 'points'
+        )
+    )
+
+    # Суммы под другими именами: annotate не может перекрыть поля модели
+    players = [
+        {
+            'id': row['player_id'],
+            'name': row['player__name'],
+            'number': row['player__number'],
+            'matches': row['matches'],
+            **{stat: row[f'total_{stat}'] or 0 for stat in LEADERBOARD_STATS},
+        }
+        for row in PlayerMatchStat.objects.filter(match__season=season).values(
+            'player_id', 'player__name', 'player__number'
+        ).annotate(
+            matches=Count('match', distinct=True),
+            **{f'total_{stat}': Sum(stat) for stat in LEADERBOARD_STATS}
+        ).order_by('player__number')
+    ]
+    leaders = {
+        stat: sorted(players, key=lambda p: p[stat], reverse=True)[:LEADERBOARD_SIZE]
+        for stat in LEADERBOARD_STATS
+    }
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'season': {'id': season.id, 'name': season.name, 'is_active': season.is_active},
+        'stats': totals,
+        'matches': match_rows,
+        'standings': standings,
+        'players': players,
+        'leaders': leaders,
+    }
+
+
+def archive_season(season):
+    """Замораживает сезон в сжатый снимок; возвращает SeasonSnapshot"""
+    if season.is_active:
+        raise ValueError(f'Сезон «{season}» ещё активен — архивировать можно только завершённый')
+    raw = json.dumps(build_season_data(season), ensure_ascii=False, separators=(',', ':')).encode()
+    snapshot, _ = SeasonSnapshot.objects.update_or_create(
+        season=season,
+        defaults={'version': SNAPSHOT_VERSION, 'data': zlib.compress(raw, 9)},
+    )
+    bump_generation('seasons')
+    return snapshot
+
+
+def get_season_json(season_id):
+    """
+    JSON данных сезона (байты) или None, если сезона нет.
+
+    Архивный сезон — один запрос (снимок вместе с сезоном), без пересчёта;
+    активный или ещё не заархивированный считается заново и кэшируется
+    до изменения результатов.
+    """
+    from .models import Season
+
+    snapshot = SeasonSnapshot.objects.select_related('season').filter(season_id=season_id).first()
+    if snapshot and snapshot.version == SNAPSHOT_VERSION and not snapshot.season.is_active:
+        return snapshot.json
+
+    season = snapshot.season if snapshot else Season.objects.filter(pk=season_id).first()
+    if season is None:
+        return None
+    return get_or_compute('results', f'season:{season.id}', lambda: json.dumps(
+        build_season_data(season), ensure_ascii=False, separators=(',', ':')
+    ).encode())
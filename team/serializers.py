@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Player, Match, News, Album, Photo, Season, Opponent
+from .models import Player, Match, MatchSet, News, NewsComment, Album, Photo, Season, Opponent
 
 
 class OpponentSerializer(serializers.ModelSerializer):
@@ -38,10 +38,33 @@ class MatchSerializer(serializers.ModelSerializer):
         ]
 
 
+class MatchSetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MatchSet
+        fields = ['number', 'home', 'away']
+
+
+class MatchDetailSerializer(MatchSerializer):
+    # Партии — только в карточке матча, список их не читает
+    sets = MatchSetSerializer(many=True, read_only=True)
+
+    class Meta(MatchSerializer.Meta):
+        fields = MatchSerializer.Meta.fields + ['balls_home', 'balls_away', 'sets']
+
+
 class NewsSerializer(serializers.ModelSerializer):
     class Meta:
         model = News
-        fields = ['id', 'title', 'slug', 'content', 'cover', 'created_at']
+        fields = [
+            'id', 'title', 'slug', 'content', 'excerpt', 'word_count', 'reading_time',
+            'cover', 'created_at', 'approved_comments_count'
+        ]
+
+
+class NewsCommentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NewsComment
+        fields = ['id', 'author_name', 'content', 'created_at']
 
 
 class PhotoSerializer(serializers.ModelSerializer):
@@ -50,6 +73,17 @@ class PhotoSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'caption', 'uploaded_at']
 
 
+class PhotoGridSerializer(serializers.ModelSerializer):
+    """Фото для сетки альбома: уменьшенные копии, размеры и заглушка вместо оригинала"""
+    src = serializers.CharField(read_only=True)
+    srcset = serializers.CharField(read_only=True)
+    original = serializers.CharField(source='image.url', read_only=True)
+
+    class Meta:
+        model = Photo
+        fields = ['id', 'caption', 'src', 'srcset', 'original', 'width', 'height', 'placeholder']
+
+
 class AlbumSerializer(serializers.ModelSerializer):
     photos = PhotoSerializer(many=True, read_only=True)
     photo_count = serializers.IntegerField(source='photos.count', read_only=True)
@@ -0,0 +1,171 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_generation
+from .export import schedule_export
+from .media import MEDIA_FIELDS, release, replaced_names
+from .models import (
+    Album, LeagueFixture, LeagueStanding, Match, MatchSet, News, NewsComment, Opponent, Photo, Player,
+    PlayerMatchStat, Season, SeasonSnapshot,
+)
+from .standings import sync_match_fixture, update_standings
+
+
+# ===== СЧЁТЧИК КОММЕНТАРИЕВ =====
+# Сигналы, а не save()/delete() модели: массовое удаление в админке
+# идёт через queryset.delete(), но post_delete всё равно отправляется.
+@receiver(post_save, sender=NewsComment)
+@receiver(post_delete, sender=NewsComment)
+def update_news_comments_count(sender, instance, **kwargs):
+    News.refresh_comments_count(instance.news_id)
+
+
+# ===== ПОКОЛЕНИЯ КЭША =====
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def bump_news_generation(sender, **kwargs):
+    bump_generation('news')
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def bump_players_generation(sender, **kwargs):
+    bump_generation('players')
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def bump_gallery_generation(sender, **kwargs):
+    bump_generation('gallery')
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+def bump_seasons_generation(sender, **kwargs):
+    bump_generation('seasons', 'results')
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Opponent)
+@receiver(post_delete, sender=Opponent)
+@receiver(post_save, sender=LeagueStanding)
+@receiver(post_delete, sender=LeagueStanding)
+@receiver(post_save, sender=PlayerMatchStat)
+@receiver(post_delete, sender=PlayerMatchStat)
+def bump_results_generation(sender, **kwargs):
+    bump_generation('results')
+
+
+# ===== АРХИВ СЕЗОНА =====
+# Архив считается неизменным; если результаты всё же поправили в админке,
+# снимок удаляется и сезон снова считается из строк до повторной архивации.
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=LeagueStanding)
+@receiver(post_delete, sender=LeagueStanding)
+@receiver(post_save, sender=LeagueFixture)
+@receiver(post_delete, sender=LeagueFixture)
+def drop_stale_snapshot(sender, instance, **kwargs):
+    SeasonSnapshot.objects.filter(season_id=instance.season_id).delete()
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def bump_season_generation(sender, instance, **kwargs):
+    # Поколение конкретного сезона: аналитика завершённых сезонов не сбрасывается
+    bump_generation(f'season:{instance.season_id}')
+    loaded_season_id = getattr(instance, '_loaded_season_id', None)
+    if loaded_season_id and loaded_season_id != instance.season_id:
+        # Матч перенесли в другой сезон — прежний сезон тоже изменился
+        bump_generation(f'season:{loaded_season_id}')
+        SeasonSnapshot.objects.filter(season_id=loaded_season_id).delete()
+    instance._loaded_season_id = instance.season_id
+
+
+@receiver(post_save, sender=PlayerMatchStat)
+@receiver(post_delete, sender=PlayerMatchStat)
+def drop_stale_snapshot_for_stat(sender, instance, **kwargs):
+    SeasonSnapshot.objects.filter(season__match=instance.match_id).delete()
+
+
+# ===== ТУРНИРНАЯ ТАБЛИЦА =====
+@receiver(post_save, sender=Match)
+def sync_fixture(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_match_fixture(instance)
+
+
+@receiver(post_save, sender=Opponent)
+def sync_opponent_fixtures(sender, instance, raw=False, **kwargs):
+    # Название соперника входит в календарь — после переименования обновляем его игры
+    if not raw:
+        for match in instance.match_set.select_related('opponent'):
+            sync_match_fixture(match)
+
+
+@receiver(post_save, sender=LeagueFixture)
+@receiver(post_delete, sender=LeagueFixture)
+def recompute_standings(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    teams = {instance.home_team, instance.away_team}
+    season_id, loaded_teams = getattr(instance, '_loaded_teams', (instance.season_id, set()))
+    if season_id != instance.season_id:
+        update_standings(season_id, loaded_teams)
+    else:
+        teams |= loaded_teams
+    update_standings(instance.season_id, teams)
+    instance._loaded_teams = (instance.season_id, {instance.home_team, instance.away_team})
+
+
+# ===== СТАТИЧЕСКИЙ ЭКСПОРТ =====
+EXPORTED_MODELS = (Player, Match, MatchSet, Opponent, Season, LeagueStanding, News, NewsComment, Album, Photo)
+
+
+def export_changed_pages(sender, instance, raw=False, **kwargs):
+    if settings.STATIC_EXPORT and not raw:
+        schedule_export(instance)
+
+
+for model in EXPORTED_MODELS:
+    post_save.connect(export_changed_pages, sender=model, dispatch_uid=f'export_{model.__name__}')
+    post_delete.connect(export_changed_pages, sender=model, dispatch_uid=f'export_delete_{model.__name__}')
+
+
+# ===== ФАЙЛЫ =====
+# Блоб общий для всех строк с тем же содержимым: удаляем файл, только
+# когда удалена последняя ссылка на него
+def release_media(sender, instance, **kwargs):
+    for model, field in MEDIA_FIELDS:
+        if model is sender:
+            release(getattr(instance, field).name)
+    if sender is Photo:
+        for name in instance.renditions.values():
+            release(name, source=instance.image.name)
+
+
+# Файл в существующей строке заменили — старый блоб освобождается так же,
+# как при удалении строки
+def remember_replaced_media(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._replaced_media = []
+    if raw or instance.pk is None:
+        return
+    for model, field in MEDIA_FIELDS:
+        if model is sender and (update_fields is None or field in update_fields):
+            instance._replaced_media += replaced_names(instance, field)
+
+
+def release_replaced_media(sender, instance, **kwargs):
+    for name, source in getattr(instance, '_replaced_media', ()):
+        release(name, source=source)
+    instance._replaced_media = []
+
+
+for model, field in MEDIA_FIELDS:
+    post_delete.connect(release_media, sender=model, dispatch_uid=f'release_media_{model.__name__}')
+    pre_save.connect(remember_replaced_media, sender=model, dispatch_uid=f'remember_media_{model.__name__}')
+    post_save.connect(release_replaced_media, sender=model, dispatch_uid=f'release_replaced_{model.__name__}')
@@ -0,0 +1,167 @@
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveSmallIntegerField, Q, Sum, When
+from django.urls import reverse
+
+from .caching import bump_generation
+from .export import schedule_paths
+from .models import OUR_TEAM, LeagueFixture, LeagueStanding, Match, Season
+
+
+# ===== ТУРНИРНАЯ ТАБЛИЦА ИЗ КАЛЕНДАРЯ ЛИГИ =====
+# LeagueStanding — материализованный результат: при новой игре пересчитываются
+# только строки двух её команд (агрегатами в SQL), затем места всех команд
+# сезона переставляются по строкам таблицы — без повторного обхода игр.
+# Сезоны с таблицей, заполненной вручную (Season.standings_from_fixtures
+# выключен), не пересчитываются: в календаре там только наши матчи.
+
+PLAYED = Q(sets_home__gt=0) | Q(sets_away__gt=0)
+
+TOTAL_FIELDS = ('played', 'wins', 'losses', 'sets_won', 'sets_lost', 'balls_won', 'balls_lost', 'points')
+
+
+def _points(own, other):
+    """Очки за игру с точки зрения одной стороны: 3:0/3:1 — 3, 3:2 — 2, 2:3 — 1"""
+    won = Q(**{f'sets_{own}__gt': F(f'sets_{other}')})
+    return Case(
+        When(won & Q(**{f'sets_{other}__lte': 1}), then=3),
+        When(won, then=2),
+        When(**{f'sets_{own}': 2}, then=1),
+        default=0,
+        output_field=PositiveSmallIntegerField(),
+    )
+
+
+def _team_totals(fixtures, own, other):
+    """Суммы по командам за игры, где команда была на стороне own (home/away)"""
+    return fixtures.values(team=F(f'{own}_team')).annotate(
+        played=Count('id'),
+        wins=Count('id', filter=Q(**{f'sets_{own}__gt': F(f'sets_{other}')})),
+        sets_won=Sum(f'sets_{own}'),
+        sets_lost=Sum(f'sets_{other}'),
+        balls_won=Sum(f'balls_{own}'),
+        balls_lost=Sum(f'balls_{other}'),
+        points=Sum(_points(own, other)),
+    ).order_by()
+
+
+def _ratio(won, lost):
+    if lost:
+        return won / lost
+    return math.inf if won else 0
+
+
+def ranking_key(row):
+    """Тай-брейки: очки, победы, соотношение сетов, соотношение мячей"""
+    return (
+        -row.points, -row.wins,
+        -_ratio(row.sets_won, row.sets_lost), -_ratio(row.balls_won, row.balls_lost),
+        row.team_name,
+    )
+
+
+def canonical_team(name):
+    """Название команды в таблице; «ВК «ИСКРА»» из ручной таблицы — это OUR_TEAM"""
+    return OUR_TEAM if OUR_TEAM in name.upper() else name
+
+
+def update_standings(season_id, teams=None):
+    """Пересчитывает строки таблицы команд teams (все команды сезона, если None)"""
+    if not Season.objects.filter(pk=season_id, standings_from_fixtures=True).exists():
+        return
+    fixtures = LeagueFixture.objects.filter(PLAYED, season_id=season_id)
+    home, away = fixtures, fixtures
+    if teams is not None:
+        teams = set(teams)
+        home = fixtures.filter(home_team__in=teams)
+        away = fixtures.filter(away_team__in=teams)
+
+    totals = {}
+    for row in [*_team_totals(home, 'home', 'away'), *_team_totals(away, 'away', 'home')]:
+        team = totals.setdefault(row['team'], dict.fromkeys(TOTAL_FIELDS, 0))
+        for field in TOTAL_FIELDS:
+            team[field] += row.get(field) or 0
+    for team in totals.values():
+        team['losses'] = team['played'] - team['wins']
+
+    with transaction.atomic():
+        rows = LeagueStanding.objects.select_for_update().filter(season_id=season_id).order_by('pk')
+        if teams is not None:
+            names = Q(team_name__in=teams)
+            if OUR_TEAM in teams:
+                names |= Q(team_name__icontains=OUR_TEAM)
+            rows = rows.filter(names)
+
+        existing, stale = {}, []
+        for row in rows:
+            name = canonical_team(row.team_name)
+            if name in existing:
+                # Вторая строка нашей команды (ручная «ВК «ИСКРА»» рядом с OUR_TEAM)
+                stale.append(row.pk)
+                continue
+            row.team_name = name
+            existing[name] = row
+
+        # Команды без сыгранных игр выпадают из таблицы
+        stale += [row.pk for name, row in existing.items() if name not in totals]
+        LeagueStanding.objects.filter(pk__in=stale).delete()
+
+        changed, created = [], []
+        for name, values in totals.items():
+            row = existing.get(name)
+            if row is None:
+                created.append(LeagueStanding(season_id=season_id, team_name=name, position=0, **values))
+            else:
+                for field, value in values.items():
+                    setattr(row, field, value)
+                changed.append(row)
+        LeagueStanding.objects.bulk_update(changed, ['team_name', *TOTAL_FIELDS])
+        LeagueStanding.objects.bulk_create(created)
+
+        _rerank(season_id)
+
+    bump_generation('results', f'season:{season_id}')
+    # bulk_update/bulk_create не отправляют сигналов, на которые подписан экспорт
+    if settings.STATIC_EXPORT:
+        schedule_paths([reverse('our_results')])
+
+
+def _rerank(season_id):
+    rows = sorted(LeagueStanding.objects.filter(season_id=season_id), key=ranking_key)
+    moved = []
+    for position, row in enumerate(rows, start=1):
+        if row.position != position:
+            row.position = position
+            moved.append(row)
+    LeagueStanding.objects.bulk_update(moved, ['position'])
+
+
+def rebuild_season(season):
+    """Переносит наши матчи в календарь и пересчитывает таблицу; False — таблица ведётся вручную"""
+    for match in Match.objects.filter(season=season, fixture__isnull=True).select_related('opponent'):
+        sync_match_fixture(match)
+    if not season.standings_from_fixtures:
+        return False
+    update_standings(season.id)
+    return True
+
+
+# ===== НАШИ МАТЧИ В КАЛЕНДАРЕ =====
+def sync_match_fixture(match):
+    """Создаёт или обновляет игру лиги для нашего матча (сеты Match — всегда наши)"""
+    opponent = match.opponent.name
+    fixture = LeagueFixture.objects.filter(match=match).first() or LeagueFixture(match=match)
+    fixture.season_id = match.season_id
+    fixture.date = match.date
+    if match.is_home:
+        fixture.home_team, fixture.away_team = OUR_TEAM, opponent
+        fixture.sets_home, fixture.sets_away = match.sets_home, match.sets_away
+        fixture.balls_home, fixture.balls_away = match.balls_home, match.balls_away
+    else:
+        fixture.home_team, fixture.away_team = opponent, OUR_TEAM
+        fixture.sets_home, fixture.sets_away = match.sets_away, match.sets_home
+        fixture.balls_home, fixture.balls_away = match.balls_away, match.balls_home
+    fixture.save()
+    return fixture
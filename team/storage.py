@@ -0,0 +1,91 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+
+re_extension = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+# ===== ХРАНИЛИЩЕ ПО СОДЕРЖИМОМУ =====
+# Файл сохраняется под sha256 своего содержимого: blobs/ab/abcdef….jpg.
+# Одно и то же фото, загруженное в несколько альбомов (или и в галерею, и
+# в карточку игрока), лежит на диске один раз, а его URL никогда не меняет
+# содержимое — рендеры и кэши можно держать бессрочно.
+# Файлы, загруженные до этого, остаются под старыми именами и открываются как раньше.
+
+def blob_name(digest, extension=''):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{extension}'
+
+
+def blob_digest(name):
+    """sha256 из имени блоба или None, если файл не из хранилища по содержимому"""
+    parts = name.split('/')
+    if len(parts) != 3 or parts[0] != BLOB_DIR:
+        return None
+    digest = os.path.splitext(parts[2])[0]
+    if len(digest) != 64 or parts[1] != digest[:2]:
+        return None
+    return digest
+
+
+def file_digest(file, chunk_size=64 * 1024):
+    """sha256 файла, читая его порциями"""
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save(), конфликтов имён не бывает
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        if not re_extension.match(extension):
+            extension = ''
+
+        # Один проход: пишем во временный файл и одновременно считаем хэш
+        directory = self.path(BLOB_DIR)
+        os.makedirs(directory, exist_ok=True)
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    sha.update(chunk)
+                    f.write(chunk)
+
+            name = blob_name(sha.hexdigest(), extension)
+            path = self.path(name)
+            try:
+                # Такой файл уже есть — второй экземпляр не храним. Обновляем mtime:
+                # release() и media_gc не удаляют свежие блобы, пока строка с новой
+                # ссылкой ещё не закоммичена
+                os.utime(path)
+                os.remove(tmp)
+                return name
+            except FileNotFoundError:
+                pass
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.directory_permissions_mode is not None:
+                os.chmod(os.path.dirname(path), self.directory_permissions_mode)
+            os.chmod(tmp, self.file_permissions_mode or 0o644)
+            # Содержимое одинаковое, поэтому гонка двух одинаковых загрузок безопасна
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return name
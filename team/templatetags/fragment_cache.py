@@ -0,0 +1,46 @@
+import hashlib
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..caching import get_or_compute
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, namespace, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.namespace = namespace
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        namespace = self.namespace.resolve(context)
+        vary = ':'.join(str(var.resolve(context)) for var in self.vary_on)
+        key = f'fragment:{name}:' + hashlib.md5(vary.encode()).hexdigest()
+        return mark_safe(get_or_compute(namespace, key, lambda: self.nodelist.render(context)))
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """
+    Кэширует фрагмент шаблона до смены поколения раздела:
+
+        {% fragment_cache "standings" "results" season.id %} ... {% endfragment_cache %}
+
+    Первый аргумент — имя фрагмента, второй — раздел (см. team.caching),
+    остальные — значения, от которых зависит содержимое.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' ожидает имя фрагмента и раздел")
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -1,3 +1,1079 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from .api import MatchViewSet, PlayerViewSet
+from .applications import pending_applications, send_digest
+from .caching import bump_generation, get_generation, get_or_compute, matchday_until, stop_matchday
+from .matchday import RENDER_LOCK_PREFIX, RENDER_RETRY_SECONDS, upcoming_matches
+from .middleware import CompressionMiddleware, ReplicaMiddleware, brotli
+from .models import (
+    EXCERPT_WORDS, WORDS_PER_MINUTE, Album, LeagueFixture, LeagueStanding, Match, News, NewsComment, Opponent, Photo,
+    Player, PlayerApplication, PlayerMatchStat, Season, SeasonSnapshot,
+)
+from .images import PLACEHOLDER_WIDTH, RENDITION_WIDTHS
+from .pagination import COMMENTS_PER_PAGE, encode_cursor
+from .profiling import PROFILE_PARAM, get_report, make_token
+from .ratelimit import client_ip
+from .roster import deploy_version
+from .routers import PRIMARY_COOKIE, REPLICA, ReplicaRouter, get_read_db, reset_read_db, set_read_db
+from .seasons import SNAPSHOT_VERSION
+from .serializers import MatchSerializer, PlayerSerializer
+from .storage import blob_digest
+
+ROWS = 40
+
+# Манифест статики собирает collectstatic, а Redis в тестах не нужен
+TEST_SETTINGS = {
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+}
+
+
+def jpeg(width=40, height=30, color='red'):
+    """Настоящий JPEG для загрузки фото: Pillow должен его прочитать"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+# ===== АДМИНКА: БЮДЖЕТ ЗАПРОСОВ =====
+# Число запросов страницы админки не должно зависеть от числа строк (N+1).
+@override_settings(**TEST_SETTINGS)
+class AdminQueryBudgetTests(TestCase):
+    BUDGET = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        season = Season.objects.create(name='2025/2026', is_active=True)
+        now = timezone.now()
+
+        # bulk_create — без сигналов пересчёта таблицы и экспорта
+        opponents = Opponent.objects.bulk_create(Opponent(name=f'Соперник {i}') for i in range(ROWS))
+        players = Player.objects.bulk_create(
+            Player(name=f'Игрок {i}', position='outside', number=i) for i in range(ROWS)
+        )
+        matches = Match.objects.bulk_create(
+            Match(season=season, opponent=opponent, date=now + timedelta(days=i), location='Зал',
+                  sets_home=3, sets_away=i % 3)
+            for i, opponent in enumerate(opponents)
+        )
+        PlayerMatchStat.objects.bulk_create(
+            PlayerMatchStat(player=player, match=match, points=10)
+            for player, match in zip(players, matches)
+        )
+        news = News.objects.bulk_create(
+            News(title=f'Новость {i}', slug=f'news-{i}', content='Текст') for i in range(ROWS)
+        )
+        NewsComment.objects.bulk_create(
+            NewsComment(news=item, author_name='Болельщик', content='Отлично!') for item in news
+        )
+        albums = Album.objects.bulk_create(Album(title=f'Альбом {i}') for i in range(ROWS))
+        Photo.objects.bulk_create(Photo(album=album, image='gallery/x.jpg') for album in albums)
+        LeagueStanding.objects.bulk_create(
+            LeagueStanding(season=season, team_name=f'Команда {i}', position=i + 1) for i in range(ROWS)
+        )
+        LeagueFixture.objects.bulk_create(
+            LeagueFixture(season=season, home_team=f'Команда {i}', away_team='ИСКРА', sets_home=3)
+            for i in range(ROWS)
+        )
+        cls.stat = PlayerMatchStat.objects.first()
+        cls.match = Match.objects.first()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertQueryBudget(self, url, budget=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        budget = budget or self.BUDGET
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{url}: {len(queries)} запросов при бюджете {budget}\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries),
+        )
+        return response
+
+    def test_changelists(self):
+        for model in (Player, Match, News, Album, Season, Opponent, PlayerMatchStat, NewsComment,
+                      LeagueStanding, LeagueFixture):
+            with self.subTest(model=model.__name__):
+                self.assertQueryBudget(reverse(f'admin:team_{model._meta.model_name}_changelist'))
+
+    def test_changelist_search_skips_full_count(self):
+        for model, term in ((PlayerMatchStat, 'Игрок'), (Season, '2025'), (Opponent, 'Соперник')):
+            with self.subTest(model=model.__name__):
+                response = self.assertQueryBudget(
+                    reverse(f'admin:team_{model._meta.model_name}_changelist') + f'?q={term}'
+                )
+                self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_change_forms_do_not_load_every_row(self):
+        self.assertQueryBudget(reverse('admin:team_playermatchstat_change', args=[self.stat.pk]))
+        self.assertQueryBudget(reverse('admin:team_match_change', args=[self.match.pk]))
+
+    def test_match_autocomplete(self):
+        url = reverse('admin:autocomplete') + '?app_label=team&model_name=playermatchstat&field_name=match&term=Сопер'
+        response = self.assertQueryBudget(url)
+        self.assertTrue(response.json()['results'])
+
+
+# ===== ХРАНИЛИЩЕ ПО СОДЕРЖИМОМУ =====
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={**TEST_SETTINGS['STORAGES'], 'default': {'BACKEND': 'team.storage.ContentAddressedStorage'}},
+            CACHES=TEST_SETTINGS['CACHES'],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.album = Album.objects.create(title='Финал')
+
+    def upload(self, content, name='photo.JPG'):
+        return Photo.objects.create(album=self.album, image=ContentFile(content, name=name))
+
+    def blob_files(self):
+        return [name for _, _, files in os.walk(self.media_root) for name in files]
+
+    def age(self, path):
+        # Старше MEDIA_GC_GRACE_MINUTES: параллельных загрузок этого файла нет
+        old = (timezone.now() - timedelta(days=1)).timestamp()
+        os.utime(path, (old, old))
+
+    def test_same_content_is_stored_once(self):
+        first = self.upload(jpeg())
+        second = self.upload(jpeg(), name='copy.jpg')
+        other = self.upload(jpeg(color='blue'))
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertTrue(first.image.name.endswith('.jpg'))
+        self.assertIsNotNone(blob_digest(first.image.name))
+        self.assertEqual(len(self.blob_files()), 2)
+
+    def test_blob_is_deleted_with_last_reference(self):
+        first = self.upload(jpeg())
+        second = self.upload(jpeg())
+        path = first.image.path
+        self.age(path)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_fresh_blob_is_left_to_media_gc(self):
+        photo = self.upload(jpeg())
+        path = photo.image.path
+        self.age(path)
+        # Та же картинка загружается снова, строка ещё не закоммичена
+        Photo.image.field.storage.save('again.jpg', ContentFile(jpeg()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.delete()
+        self.assertTrue(os.path.exists(path))
+
+    def test_replaced_file_is_released(self):
+        photo = self.upload(jpeg())
+        path = photo.image.path
+        self.age(path)
+
+        photo = Photo.objects.get(pk=photo.pk)
+        photo.image = ContentFile(jpeg(color='blue'), name='photo.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(photo.image.path))
+
+
+# ===== РЕНДЕРЫ ФОТОГРАФИЙ =====
+class PhotoRenditionTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(**TEST_SETTINGS, MEDIA_ROOT=self.media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.album = Album.objects.create(title='Финал')
+
+    def upload(self, width, height, name='photo.jpg'):
+        return Photo.objects.create(album=self.album, image=ContentFile(jpeg(width, height), name=name))
+
+    def test_large_photo_gets_all_renditions(self):
+        photo = self.upload(1600, 1200)
+
+        self.assertEqual((photo.width, photo.height), (1600, 1200))
+        self.assertEqual(sorted(photo.renditions, key=int), [str(width) for width in RENDITION_WIDTHS])
+        for width, name in photo.renditions.items():
+            with Image.open(os.path.join(self.media_root, name)) as image:
+                self.assertEqual(image.size, (int(width), int(width) * 3 // 4))
+                self.assertEqual(image.format, 'JPEG')
+
+        # Сохранено и в базе, не только на экземпляре
+        self.assertEqual(Photo.objects.get(pk=photo.pk).renditions, photo.renditions)
+
+    def test_placeholder_is_tiny_data_uri(self):
+        photo = self.upload(1600, 1200)
+
+        prefix = 'data:image/jpeg;base64,'
+        self.assertTrue(photo.placeholder.startswith(prefix))
+        raw = base64.b64decode(photo.placeholder[len(prefix):])
+        with Image.open(io.BytesIO(raw)) as image:
+            self.assertEqual(image.size, (PLACEHOLDER_WIDTH, 12))
+        self.assertLess(len(photo.placeholder), 1000)
+
+    def test_src_and_srcset(self):
+        photo = self.upload(1600, 1200)
+        storage = photo.image.storage
+
+        self.assertEqual(photo.src, storage.url(photo.renditions['640']))
+        self.assertEqual(photo.srcset.split(', '), [
+            f'{storage.url(photo.renditions["320"])} 320w',
+            f'{storage.url(photo.renditions["640"])} 640w',
+            f'{storage.url(photo.renditions["1280"])} 1280w',
+            f'{photo.image.url} 1600w',
+        ])
+
+    def test_small_photo_is_not_upscaled(self):
+        photo = self.upload(400, 300)
+
+        self.assertEqual(list(photo.renditions), ['320'])
+        photo = self.upload(200, 150, name='small.jpg')
+        self.assertEqual(photo.renditions, {})
+        self.assertEqual(photo.src, photo.image.url)
+        self.assertEqual(photo.srcset, f'{photo.image.url} 200w')
+
+    def test_unreadable_file_is_left_unprocessed(self):
+        with self.assertLogs('team.images', 'WARNING'):
+            photo = Photo.objects.create(album=self.album, image=ContentFile(b'not an image', name='broken.jpg'))
+        self.assertIsNone(photo.width)
+        self.assertEqual(photo.placeholder, '')
+        self.assertEqual(photo.src, photo.image.url)
+
+    def test_album_photos_api(self):
+        first = self.upload(1600, 1200)
+        second = self.upload(200, 150, name='small.jpg')
+
+        response = self.client.get(reverse('api_album_photos', args=[self.album.pk]))
+        self.assertEqual(response.status_code, 200)
+        results = {item['id']: item for item in response.json()['results']}
+        self.assertEqual(set(results), {first.pk, second.pk})
+        self.assertEqual(results[first.pk], {
+            'id': first.pk,
+            'caption': '',
+            'src': first.src,
+            'srcset': first.srcset,
+            'original': first.image.url,
+            'width': 1600,
+            'height': 1200,
+            'placeholder': first.placeholder,
+        })
+        self.assertEqual(results[second.pk]['src'], second.image.url)
+
+
+# ===== СОСТАВ КОМАНДЫ =====
+@override_settings(**TEST_SETTINGS)
+class RosterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Player.objects.create(name='Связующий', position='setter', number=7)
+        Player.objects.create(name='Доигровщик', position='outside', number=3)
+        Player.objects.create(name='Бывший', position='outside', number=1, is_active=False)
+
+    def setUp(self):
+        # Состав кэшируется между тестами, а откат транзакции поколение не возвращает
+        cache.clear()
+
+    def test_roster_is_grouped_by_position(self):
+        roster = self.client.get(reverse('api_players_roster')).json()
+        self.assertEqual(roster['count'], 2)
+        self.assertEqual([group['position'] for group in roster['positions']], ['setter', 'outside'])
+
+    def test_roster_etag_changes_with_players(self):
+        url = reverse('api_players_roster')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Player.objects.create(name='Либеро', position='libero', number=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_players_page_etag_changes_with_release(self):
+        deploy_version.cache_clear()
+        self.addCleanup(deploy_version.cache_clear)
+        etag = self.client.get(reverse('players'))['ETag']
+        self.assertEqual(self.client.get(reverse('players'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        deploy_version.cache_clear()
+        with override_settings(RELEASE='next-release'):
+            response = self.client.get(reverse('players'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_player_by_number(self):
+        response = self.client.get(reverse('api_player_by_number', args=[7]))
+        self.assertEqual(response.json()['name'], 'Связующий')
+        self.assertEqual(self.client.get(reverse('api_player_by_number', args=[1])).status_code, 404)
+
+
+# ===== ЗАЯВКИ И СВОДКА ТРЕНЕРАМ =====
+@override_settings(**TEST_SETTINGS, RATELIMITS={'join': '100/m'}, COACH_EMAILS=['coach@example.com'],
+                   APPLICATION_DIGEST_SIZE=2)
+class ApplicationDigestTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def apply(self, phone, email='', name='Игрок'):
+        return self.client.post(reverse('join_team'), {
+            'name': name, 'age': 20, 'position': 'libero', 'phone': phone, 'email': email,
+        })
+
+    def test_repeated_application_is_not_duplicated(self):
+        self.apply('+7 (900) 123-45-67')
+        self.apply('8 900 123 45 67')
+        self.apply('+7 911 000-00-00', email='Player@Example.com')
+        self.apply('000', email='player@example.com ')
+
+        self.assertEqual(PlayerApplication.objects.count(), 2)
+        self.assertEqual(sorted(PlayerApplication.objects.values_list('repeats', flat=True)), [1, 1])
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_old_application_does_not_block_new_one(self):
+        self.apply('+79001234567')
+        PlayerApplication.objects.update(submitted_at=timezone.now() - timedelta(days=30))
+        self.apply('+79001234567')
+        self.assertEqual(PlayerApplication.objects.count(), 2)
+
+    def test_digest_is_sent_once(self):
+        for i in range(3):
+            self.apply(f'+7900000000{i}', name=f'Игрок {i}')
+
+        self.assertEqual(send_digest(), (3, 2))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Игрок 2', mail.outbox[1].body)
+        self.assertFalse(pending_applications().exists())
+
+        self.assertEqual(send_digest(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+
+# ===== РЕЖИМ МАТЧА =====
+@override_settings(**TEST_SETTINGS)
+class MatchdayTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        season = Season.objects.create(name='2025/2026', is_active=True)
+        opponent = Opponent.objects.create(name='Динамо')
+        cls.match = Match.objects.create(
+            season=season, opponent=opponent, date=timezone.now() + timedelta(hours=1), location='Зал',
+        )
+        Album.objects.create(title='Финал')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(stop_matchday)
+
+    def test_upcoming_match_enables_mode(self):
+        self.assertEqual(list(upcoming_matches()), [self.match])
+        call_command('matchday', stdout=io.StringIO())
+        self.assertIsNotNone(matchday_until())
+
+    def test_heavy_sections_are_served_from_snapshots(self):
+        call_command('matchday', stdout=io.StringIO())
+        Album.objects.create(title='Новый')
+
+        response = self.client.get('/api/albums/')
+        self.assertEqual(response['X-Matchday'], 'cached')
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+        stop_matchday()
+        self.assertEqual(len(json.loads(b''.join(self.client.get('/api/albums/').streaming_content))), 2)
+
+    def test_album_pages_stay_available(self):
+        call_command('matchday', stdout=io.StringIO())
+        album = Album.objects.get()
+
+        for url in (reverse('album_detail', args=[album.pk]), reverse('api_album_photos', args=[album.pk]),
+                    reverse('gallery') + '?page=2'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                # Второй запрос — уже из снимка
+                self.assertEqual(self.client.get(url)['X-Matchday'], 'cached')
+
+    def test_unknown_params_do_not_bypass_snapshots(self):
+        call_command('matchday', stdout=io.StringIO())
+        response = self.client.get(reverse('gallery'), {'x': 'random'})
+        self.assertEqual(response['X-Matchday'], 'cached')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('gallery'), {'page': 2, 'x': 'random'})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(queries.captured_queries)
+
+    @override_settings(DEBUG=False, SECURE_SSL_REDIRECT=True)
+    def test_prewarm_behind_ssl_redirect(self):
+        out = io.StringIO()
+        call_command('matchday', stdout=out)
+        self.assertNotIn(' 301 ', out.getvalue())
+        self.assertEqual(self.client.get('/api/albums/', secure=True)['X-Matchday'], 'cached')
+
+    def test_page_being_rendered_elsewhere_asks_to_retry(self):
+        call_command('matchday', stdout=io.StringIO())
+        url = reverse('album_detail', args=[Album.objects.get().pk])
+        cache.add(RENDER_LOCK_PREFIX + url, 1)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(RENDER_RETRY_SECONDS))
+
+
+# ===== ГАЛЕРЕЯ: ПОСТРАНИЧНЫЙ ВЫВОД =====
+@override_settings(**TEST_SETTINGS)
+class GalleryPaginationTests(TestCase):
+    ORDERING = ('-created_at', '-id')
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(13):
+            Album.objects.create(title=f'Альбом {i:02d}')
+        cls.albums = list(Album.objects.order_by(*cls.ORDERING))
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, response):
+        return [album.title for album in response.context['albums'].object_list]
+
+    def test_cursor_follows_page_number(self):
+        cursor = encode_cursor(self.albums[5], self.ORDERING)
+        response = self.client.get(reverse('gallery'), {'page': 2, 'after': cursor})
+        self.assertEqual(self.titles(response), [album.title for album in self.albums[6:12]])
+
+    def test_mismatched_cursor_does_not_poison_page(self):
+        # Устаревшая ссылка: курсор со второй страницы при ?page=1
+        cursor = encode_cursor(self.albums[7], self.ORDERING)
+        response = self.client.get(reverse('gallery'), {'page': 1, 'after': cursor})
+        self.assertEqual(self.titles(response), [album.title for album in self.albums[:6]])
+
+        # Курсор из середины страницы: выборка другая, и фрагмент кэшируется отдельно
+        self.client.get(reverse('gallery'), {'page': 2, 'after': encode_cursor(self.albums[2], self.ORDERING)})
+        response = self.client.get(reverse('gallery'), {'page': 2})
+        self.assertContains(response, self.albums[6].title)
+        self.assertNotContains(response, self.albums[3].title)
+
+    def test_before_cursor_returns_previous_page(self):
+        cursor = encode_cursor(self.albums[6], self.ORDERING)
+        response = self.client.get(reverse('gallery'), {'page': 1, 'before': cursor})
+        self.assertEqual(self.titles(response), [album.title for album in self.albums[:6]])
+
+        cursor = encode_cursor(self.albums[12], self.ORDERING)
+        response = self.client.get(reverse('gallery'), {'page': 2, 'before': cursor})
+        self.assertEqual(self.titles(response), [album.title for album in self.albums[6:12]])
+
+    def test_last_page(self):
+        cursor = encode_cursor(self.albums[11], self.ORDERING)
+        for params in ({'page': 3, 'after': cursor}, {'page': 3}):
+            response = self.client.get(reverse('gallery'), params)
+            self.assertEqual(self.titles(response), [self.albums[12].title])
+            self.assertFalse(response.context['albums'].has_next())
+
+    def test_mid_page_cursor_is_checked_against_page_number(self):
+        # Курсор из середины первой страницы при ?page=2 / ?page=3 — страница выбирается по номеру
+        after = encode_cursor(self.albums[2], self.ORDERING)
+        before = encode_cursor(self.albums[9], self.ORDERING)
+        for params, expected in (
+            ({'page': 2, 'after': after}, self.albums[6:12]),
+            ({'page': 3, 'after': after}, self.albums[12:]),
+            ({'page': 1, 'before': before}, self.albums[:6]),
+        ):
+            response = self.client.get(reverse('gallery'), params)
+            self.assertEqual(self.titles(response), [album.title for album in expected])
+            self.assertEqual(response.context['albums'].number, params['page'])
+
+
+# ===== ПРОФИЛИ ЗАПРОСОВ =====
+@override_settings(**TEST_SETTINGS, RATELIMITS={'profile': '100/m'})
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        Season.objects.create(name='2025/2026', is_active=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def test_signed_request_is_profiled(self):
+        response = self.client.get(reverse('our_results'), {PROFILE_PARAM: make_token(self.staff)})
+        report = get_report(response['X-Profile-Id'])
+        self.assertEqual(report['path'], reverse('our_results'))
+        self.assertTrue(report['queries'])
+        self.assertIn('cumulative', report['stats'])
+
+        self.assertContains(self.client.get(reverse('admin:profile_reports')), report['id'])
+        self.assertEqual(self.client.get(reverse('admin:profile_report', args=[report['id']])).status_code, 200)
+
+    def test_without_valid_token_nothing_is_profiled(self):
+        response = self.client.get(reverse('our_results'), {PROFILE_PARAM: 'forged'})
+        self.assertNotIn('X-Profile-Id', response)
+
+        token = make_token(self.staff)
+        self.client.logout()
+        response = self.client.get(reverse('our_results'), HTTP_X_PROFILE=token)
+        self.assertNotIn('X-Profile-Id', response)
+
+    @override_settings(RATELIMITS={'profile': '1/m'})
+    def test_limit_is_per_staff_member(self):
+        colleague = get_user_model().objects.create_user('coach', 'coach@example.com', 'password', is_staff=True)
+        for user, profiled in ((self.staff, True), (self.staff, False), (colleague, True)):
+            self.client.force_login(user)
+            response = self.client.get(reverse('our_results'), HTTP_X_PROFILE=make_token(user))
+            self.assertEqual('X-Profile-Id' in response, profiled)
+
+    def test_reports_are_admin_pages(self):
+        self.client.logout()
+        response = self.client.get(reverse('admin:profile_reports'))
+        self.assertRedirects(response, reverse('admin:login') + '?next=' + reverse('admin:profile_reports'))
+
+
+# ===== ТУРНИРНАЯ ТАБЛИЦА =====
+@override_settings(**TEST_SETTINGS)
+class StandingsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.opponent = Opponent.objects.create(name='Динамо')
+
+    def table(self, season):
+        return list(LeagueStanding.objects.filter(season=season).values_list('team_name', 'points'))
+
+    def test_manual_table_is_left_alone(self):
+        season = Season.objects.create(name='2024/2025', standings_from_fixtures=False)
+        LeagueStanding.objects.bulk_create(
+            LeagueStanding(season=season, team_name=name, position=i, points=points)
+            for i, (name, points) in enumerate([('Динамо', 9), ('ВК «ИСКРА»', 6), ('Ротор', 3)], start=1)
+        )
+        before = self.table(season)
+
+        match = Match.objects.create(
+            season=season, opponent=self.opponent, date=timezone.now() + timedelta(days=1), location='Зал',
+        )
+        self.assertEqual(self.table(season), before)
+        match.sets_home, match.sets_away = 3, 0
+        match.save()
+        self.assertEqual(self.table(season), before)
+        self.assertTrue(LeagueFixture.objects.filter(match=match).exists())
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'a@example.com', 'password'))
+        self.client.post(reverse('admin:team_season_changelist'), {
+            'action': 'recompute_standings', '_selected_action': [season.pk],
+        })
+        self.assertEqual(self.table(season), before)
+
+    def test_results_page_summary_is_cached(self):
+        season = Season.objects.create(name='2025/2026', standings_from_fixtures=False)
+        LeagueStanding.objects.create(season=season, team_name='ВК «Искра»', position=2, points=3)
+        now = timezone.now()
+        Match.objects.create(season=season, opponent=self.opponent, date=now, location='Зал', sets_home=3, sets_away=0)
+        match = Match.objects.create(
+            season=season, opponent=self.opponent, date=now, location='Зал', sets_home=1, sets_away=3,
+        )
+
+        response = self.client.get(reverse('our_results'))
+        self.assertEqual(response.context['stats'], {
+            'played': 2, 'wins': 1, 'losses': 1, 'sets_won': 4, 'sets_lost': 3, 'points': 3,
+        })
+        self.assertEqual(response.context['iskra_standing']['position'], 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('our_results'))
+        self.assertContains(response, 'Сеты:</strong> 4 : 3')
+        touched = [q['sql'] for q in queries if 'team_match' in q['sql'] or 'team_leaguestanding' in q['sql']]
+        self.assertEqual(touched, [])
+
+        match.sets_home, match.sets_away = 3, 1
+        match.save()
+        self.assertEqual(self.client.get(reverse('our_results')).context['stats']['wins'], 2)
+
+    def test_our_manual_row_is_merged(self):
+        season = Season.objects.create(name='2025/2026')
+        LeagueStanding.objects.create(season=season, team_name='ВК «ИСКРА»', position=1, points=6)
+        Match.objects.create(
+            season=season, opponent=self.opponent, date=timezone.now(), location='Зал', sets_home=3, sets_away=2,
+        )
+        self.assertEqual(sorted(self.table(season)), [('Динамо', 1), ('ИСКРА', 2)])
+
+    def test_moved_match_resets_previous_season(self):
+        old, new = Season.objects.create(name='2024/2025'), Season.objects.create(name='2025/2026')
+        match = Match.objects.create(
+            season=old, opponent=self.opponent, date=timezone.now(), location='Зал', sets_home=3, sets_away=0,
+        )
+        SeasonSnapshot.objects.create(season=old, version=SNAPSHOT_VERSION, data=b'')
+        generation = get_generation(f'season:{old.pk}')
+
+        match = Match.objects.get(pk=match.pk)
+        match.season = new
+        match.save()
+        self.assertNotEqual(get_generation(f'season:{old.pk}'), generation)
+        self.assertFalse(SeasonSnapshot.objects.filter(season=old).exists())
+        self.assertEqual(self.table(old), [])
+
+    def test_admin_sets_save_match_once(self):
+        season = Season.objects.create(name='2025/2026')
+        match = Match.objects.create(season=season, opponent=self.opponent, date=timezone.now(), location='Зал')
+        saves = []
+        post_save.connect(lambda **kwargs: saves.append(kwargs['instance'].pk), sender=Match, weak=False,
+                          dispatch_uid='test_match_saves')
+        self.addCleanup(post_save.disconnect, sender=Match, dispatch_uid='test_match_saves')
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'a@example.com', 'password'))
+        date = timezone.localtime(match.date)
+        sets = [(25, 20), (20, 25), (25, 23), (23, 25), (15, 13)]
+        data = {
+            'season': season.pk, 'opponent': self.opponent.pk, 'location': 'Зал', 'is_home': 'on',
+            'date_0': date.strftime('%Y-%m-%d'), 'date_1': date.strftime('%H:%M:%S'),
+            'sets_home': 0, 'sets_away': 0,
+            'sets-TOTAL_FORMS': len(sets), 'sets-INITIAL_FORMS': 0,
+        }
+        for i, (home, away) in enumerate(sets):
+            data.update({f'sets-{i}-number': i + 1, f'sets-{i}-home': home, f'sets-{i}-away': away})
+        response = self.client.post(reverse('admin:team_match_change', args=[match.pk]), data)
+        self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(saves, [match.pk])
+        match.refresh_from_db()
+        self.assertEqual((match.result, match.points, match.balls_home), ('3:2', 2, 108))
+        self.assertEqual(self.table(season), [('ИСКРА', 2), ('Динамо', 1)])
+
+
+# ===== АРХИВ СЕЗОНА =====
+@override_settings(**TEST_SETTINGS)
+class SeasonArchiveTests(TestCase):
+
+    def test_archive_all_refreshes_old_format(self):
+        current = Season.objects.create(name='2023/2024', is_active=False)
+        outdated = Season.objects.create(name='2024/2025', is_active=False)
+        SeasonSnapshot.objects.create(season=current, version=SNAPSHOT_VERSION, data=b'current')
+        SeasonSnapshot.objects.create(season=outdated, version=SNAPSHOT_VERSION - 1, data=b'outdated')
+
+        call_command('archive_season', '--all', stdout=io.StringIO())
+        self.assertEqual(SeasonSnapshot.objects.get(season=current).data, b'current')
+        self.assertEqual(SeasonSnapshot.objects.get(season=outdated).version, SNAPSHOT_VERSION)
+
+
+# ===== СТАТИЧЕСКИЙ ЭКСПОРТ =====
+@override_settings(**TEST_SETTINGS, STATIC_EXPORT=True)
+class StaticExportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = override_settings(STATIC_EXPORT_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.root = root
+
+    def exported(self, path):
+        return os.path.exists(os.path.join(self.root, path.strip('/'), 'index.html'))
+
+    def test_standings_recompute_exports_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            season = Season.objects.create(name='2025/2026', is_active=True)
+        shutil.rmtree(self.root)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LeagueFixture.objects.create(
+                season=season, date=timezone.now(), home_team='Динамо', away_team='Ротор', sets_home=3, sets_away=1,
+            )
+        self.assertTrue(self.exported(reverse('our_results')))
+
+    def test_rolled_back_save_does_not_block_later_exports(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Player.objects.create(name='Иванов', position='setter', number=7)
+            raise RuntimeError
+        self.assertFalse(self.exported(reverse('players')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Player.objects.create(name='Петров', position='libero', number=8)
+        self.assertTrue(self.exported(reverse('players')))
+
+    @override_settings(DEBUG=False, SECURE_SSL_REDIRECT=True)
+    def test_export_behind_ssl_redirect(self):
+        call_command('export_static', reverse('players'), stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertTrue(self.exported(reverse('players')))
+
+    def test_export_with_nothing_written_fails(self):
+        with self.assertRaises(CommandError):
+            call_command('export_static', '/no-trailing-slash', stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_renamed_news_removes_old_page(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            news = News.objects.create(title='Победа', slug='pobeda', content='Текст')
+        old_path = reverse('news_detail', args=['pobeda'])
+        self.assertTrue(self.exported(old_path))
+
+        news = News.objects.get(pk=news.pk)
+        news.slug = 'pobeda-v-finale'
+        with self.captureOnCommitCallbacks(execute=True):
+            news.save()
+        self.assertTrue(self.exported(reverse('news_detail', args=[news.slug])))
+        self.assertFalse(os.path.exists(os.path.join(self.root, old_path.strip('/'))))
+
+
+# ===== ЧТЕНИЕ С РЕПЛИКИ =====
+@override_settings(**TEST_SETTINGS)
+class ReplicaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def read_db_for(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(get_read_db())
+            return HttpResponse()
+
+        with mock.patch('team.middleware.replica_available', return_value=True):
+            response = ReplicaMiddleware(get_response)(request)
+        return seen[0], response
+
+    def test_router_reads_from_assigned_database(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(News), 'default')
+        token = set_read_db(REPLICA)
+        try:
+            self.assertEqual(router.db_for_read(News), REPLICA)
+            self.assertEqual(router.db_for_write(News), 'default')
+        finally:
+            reset_read_db(token)
+        self.assertFalse(router.allow_migrate(REPLICA, 'team'))
+
+    def test_public_get_reads_from_replica(self):
+        db, response = self.read_db_for(self.factory.get('/news/'))
+        self.assertEqual(db, REPLICA)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(get_read_db(), 'default')
+
+    def test_writes_and_admin_stick_to_primary(self):
+        db, response = self.read_db_for(self.factory.post('/news/pobeda/'))
+        self.assertEqual(db, 'default')
+        self.assertEqual(response.cookies[PRIMARY_COOKIE]['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+        self.assertEqual(self.read_db_for(self.factory.get(reverse('admin:index')))[0], 'default')
+        request = self.factory.get('/news/')
+        request.COOKIES[PRIMARY_COOKIE] = '1'
+        self.assertEqual(self.read_db_for(request)[0], 'default')
+
+    def test_fill_after_bump_reads_from_primary(self):
+        token = set_read_db(REPLICA)
+        try:
+            get_or_compute('news', 'list', get_read_db)
+            self.assertEqual(get_or_compute('news', 'list', get_read_db), REPLICA)
+
+            bump_generation('news')
+            self.assertEqual(get_or_compute('news', 'list', get_read_db), 'default')
+            self.assertEqual(get_read_db(), REPLICA)
+        finally:
+            reset_read_db(token)
+
+
+# ===== НОВОСТИ И КОММЕНТАРИИ =====
+@override_settings(**TEST_SETTINGS)
+class NewsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.news = News.objects.create(title='Победа', slug='pobeda', content='Текст')
+
+    def count(self):
+        return News.objects.get(pk=self.news.pk).approved_comments_count
+
+    def test_excerpt_strips_html_and_truncates(self):
+        news = News.objects.create(
+            title='Матч', slug='match', content='<p>Команда <b>ИСКРА</b> победила</p>\n' + 'слово ' * 40,
+        )
+        self.assertTrue(news.excerpt.startswith('Команда ИСКРА победила слово'))
+        self.assertNotIn('<', news.excerpt)
+        self.assertEqual(len(news.excerpt.split()), EXCERPT_WORDS)
+        self.assertTrue(news.excerpt.endswith('…'))
+        self.assertEqual(news.word_count, 43)
+
+    def test_reading_time_rounds_up(self):
+        for words, minutes in ((0, 1), (WORDS_PER_MINUTE, 1), (WORDS_PER_MINUTE + 1, 2), (WORDS_PER_MINUTE * 3, 3)):
+            with self.subTest(words=words):
+                self.news.content = 'слово ' * words
+                self.news.save(update_fields=['content'])
+                self.news.refresh_from_db()
+                self.assertEqual((self.news.word_count, self.news.reading_time), (words, minutes))
+
+    def test_approved_count_follows_moderation(self):
+        comment = NewsComment.objects.create(
+            news=self.news, author_name='Болельщик', content='Отлично!', is_approved=False,
+        )
+        other = NewsComment.objects.create(news=self.news, author_name='Болельщик', content='Ура!')
+        self.assertEqual(self.count(), 1)
+
+        comment.is_approved = True
+        comment.save()
+        self.assertEqual(self.count(), 2)
+
+        comment.is_approved = False
+        comment.save()
+        self.assertEqual(self.count(), 1)
+
+        other.delete()
+        self.assertEqual(self.count(), 0)
+
+        comment.is_approved = True
+        comment.save()
+        NewsComment.objects.filter(pk=comment.pk).delete()
+        self.assertEqual(self.count(), 0)
+
+    def test_cursor_pages_do_not_overlap(self):
+        total = COMMENTS_PER_PAGE * 2 + 5
+        NewsComment.objects.bulk_create(
+            NewsComment(news=self.news, author_name='Болельщик', content=f'Комментарий {i}', is_approved=True)
+            for i in range(total)
+        )
+        # Одинаковое время: порядок держится на id
+        NewsComment.objects.update(created_at=timezone.now())
+
+        seen, after, pages = [], None, 0
+        while True:
+            params = {'after': after} if after else {}
+            data = self.client.get(reverse('api_news_comments', args=[self.news.slug]), params).json()
+            seen += [comment['id'] for comment in data['results']]
+            pages += 1
+            after = data['next']
+            if not after:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), total)
+        self.assertEqual(len(set(seen)), total)
+
+
+# ===== ПОТОКОВЫЕ СПИСКИ API =====
+@override_settings(**TEST_SETTINGS)
+class StreamingApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        season = Season.objects.create(name='2025/2026')
+        now = timezone.now()
+        for i, (opponent, sets_home, sets_away, is_home) in enumerate(
+            [('Динамо', 3, 0, True), ('Ротор', 2, 3, False), ('Факел', 3, 2, True), ('Зенит', 0, 0, False)]
+        ):
+            Match.objects.create(
+                season=season, opponent=Opponent.objects.create(name=opponent), date=now + timedelta(days=i),
+                location='Зал', is_home=is_home, sets_home=sets_home, sets_away=sets_away,
+            )
+        Player.objects.create(name='Связующий', position='setter', number=7, photo='players/7.jpg', bio='Капитан')
+        Player.objects.create(name='Либеро', position='libero', number=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertMatchesSerializer(self, url, queryset, serializer_class):
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(streamed)
+
+        request = RequestFactory().get(url)
+        expected = json.loads(JSONRenderer().render(
+            serializer_class(queryset, many=True, context={'request': request}).data
+        ))
+        self.assertEqual(streamed, expected)
+
+    def test_matches_stream_like_serializer(self):
+        self.assertMatchesSerializer('/api/matches/', MatchViewSet.queryset.all(), MatchSerializer)
+
+    def test_players_stream_like_serializer(self):
+        self.assertMatchesSerializer('/api/players/', PlayerViewSet.queryset.all(), PlayerSerializer)
+
+
+# ===== СЖАТИЕ ОТВЕТОВ =====
+@override_settings(**TEST_SETTINGS, COMPRESSION_MIN_SIZE=200)
+class CompressionTests(TestCase):
+    BODY = ('<p>ИСКРА — волейбол</p>' * 50).encode()
+
+    def compress(self, response, accept='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def page(self, body=None):
+        return HttpResponse(body or self.BODY, content_type='text/html; charset=utf-8')
+
+    @skipUnless(brotli, 'пакет Brotli не установлен')
+    def test_brotli_preferred(self):
+        response = self.compress(self.page())
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.BODY)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_without_brotli_support(self):
+        response = self.compress(self.page(), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_and_binary_responses_untouched(self):
+        response = self.compress(self.page(b'<p>mini</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.compress(HttpResponse(self.BODY, content_type='image/jpeg'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(brotli, 'пакет Brotli не установлен')
+    def test_csrf_pages_use_gzip(self):
+        # BREACH: у gzip Django есть случайная добавка к длине, у brotli — нет
+        response = self.page()
+        response.set_cookie(settings.CSRF_COOKIE_NAME, 'token')
+        response = self.compress(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @skipUnless(brotli, 'пакет Brotli не установлен')
+    def test_streaming_response(self):
+        chunks = [self.BODY[:500], self.BODY[500:]]
+        response = self.compress(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), self.BODY)
+
+        response = self.compress(StreamingHttpResponse(iter(chunks), content_type='application/json'), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.BODY)
+
+
+# ===== АНАЛИТИКА =====
+@override_settings(**TEST_SETTINGS)
+class AnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = Season.objects.create(name='2024/2025', is_active=False)
+        cls.second = Season.objects.create(name='2025/2026')
+        cls.dynamo = Opponent.objects.create(name='Динамо')
+        rotor = Opponent.objects.create(name='Ротор')
+
+        def play(season, opponent, date, sets_home, sets_away):
+            Match.objects.create(
+                season=season, opponent=opponent, location='Зал', sets_home=sets_home, sets_away=sets_away,
+                date=datetime(*date, 12, tzinfo=dt_timezone.utc),
+            )
+
+        play(cls.first, cls.dynamo, (2025, 1, 15), 3, 0)
+        play(cls.first, cls.dynamo, (2025, 1, 22), 2, 3)
+        play(cls.first, rotor, (2025, 2, 15), 3, 2)
+        play(cls.first, cls.dynamo, (2025, 3, 15), 0, 0)  # не сыгран
+        play(cls.second, cls.dynamo, (2025, 10, 15), 3, 1)
+        play(cls.second, cls.dynamo, (2025, 11, 15), 1, 3)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, *args):
+        return self.client.get(reverse(name, args=args)).json()
+
+    def test_head_to_head(self):
+        data = self.get('api_head_to_head', self.dynamo.pk)
+        totals = data['totals']
+        self.assertEqual(
+            (totals['played'], totals['wins'], totals['losses'], totals['sets_won'], totals['sets_lost']),
+            (4, 2, 2, 9, 7),
+        )
+        self.assertEqual((totals['points'], totals['win_rate'], totals['set_ratio']), (7, 0.5, 1.286))
+        self.assertEqual(
+            [(row['season']['name'], row['played'], row['wins'], row['points']) for row in data['seasons']],
+            [('2024/2025', 2, 1, 4), ('2025/2026', 2, 1, 3)],
+        )
+        self.assertEqual([row['result'] for row in data['matches']], ['3:0', '2:3', '3:1', '1:3'])
+        self.assertEqual([row['points'] for row in data['matches']], [3, 1, 3, 0])
+        self.assertEqual([row['running_win_rate'] for row in data['matches']], [1.0, 0.5, 0.667, 0.5])
+
+    def test_season_trends_by_month(self):
+        data = self.get('api_season_trends', self.first.pk)
+        self.assertEqual(
+            [(row['month'], row['played'], row['wins'], row['points']) for row in data['months']],
+            [('2025-01', 2, 1, 4), ('2025-02', 1, 1, 2)],
+        )
+        self.assertEqual((data['totals']['played'], data['totals']['points_per_match']), (3, 2.0))
+
+    def test_season_over_season(self):
+        first, second = self.get('api_trends')['seasons']
+        self.assertEqual((first['win_rate'], first['set_ratio'], first['points_per_match']), (0.667, 1.6, 2.0))
+        self.assertNotIn('win_rate_change', first)
+        self.assertEqual((second['win_rate'], second['set_ratio'], second['points_per_match']), (0.5, 1.0, 1.5))
+        self.assertEqual(
+            (second['win_rate_change'], second['set_ratio_change'], second['points_per_match_change']),
+            (-0.167, -0.6, -0.5),
+        )
+
+
+# ===== ОГРАНИЧЕНИЕ ЧАСТОТЫ =====
+@override_settings(**TEST_SETTINGS, RATELIMITS={'join': '2/h'}, TRUSTED_PROXY_COUNT=1)
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_spoofed_forwarded_for_does_not_reset_limit(self):
+        statuses = [
+            self.client.post(
+                reverse('join_team'), {}, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7',
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_client_ip_is_taken_from_trusted_proxy(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_ip(request), '203.0.113.7')
+        with self.settings(TRUSTED_PROXY_COUNT=0):
+            self.assertEqual(client_ip(request), '10.0.0.1')
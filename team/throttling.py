@@ -0,0 +1,17 @@
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .ratelimit import is_rate_limited, parse_rate
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Троттлинг DRF на общем с формами скользящем окне (лимит RATELIMITS['api'])"""
+
+    scope = 'api'
+
+    def allow_request(self, request, view):
+        return not is_rate_limited(request, self.scope)
+
+    def wait(self):
+        rate = settings.RATELIMITS.get(self.scope)
+        return parse_rate(rate)[1] if rate else None
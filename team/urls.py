@@ -1,14 +1,6 @@
-from django.urls import path, include
+from django.urls import include, path
 from . import views
 from .feeds import LatestNewsFeed
-from rest_framework.routers import DefaultRouter
-from .api import *
-
-router = DefaultRouter()
-router.register(r'players', PlayerViewSet)
-router.register(r'matches', MatchViewSet)
-router.register(r'news', NewsViewSet)
-router.register(r'albums', AlbumViewSet)
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -22,9 +14,8 @@ urlpatterns = [
     path('join/', views.join_team, name='join_team'),
     path('feeds/latest-news/', LatestNewsFeed(), name='news_feed'),
     path('table/', views.league_table, name='league_table'),
+    path('seasons/<int:season_id>/', views.season_archive, name='season_archive'),
 
     # API routes
-    path('api/', api_home, name='api_home'),
-    path('api/current-season/', current_season, name='api_current_season'),
-    path('api/', include(router.urls)),
+    path('api/', include('team.api_urls')),
 ]
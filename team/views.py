@@ -1,43 +1,39 @@
+import json
+
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 from django.db import models
-from .models import Player, Match, News, Album, Season, Opponent, NewsComment, LeagueStanding, PlayerApplication
-from django.core.mail import send_mail
-from django.conf import settings
+from .models import Match, News, Album, Season, NewsComment, LeagueStanding, PlayerApplication
+from .applications import submit_application
+from .caching import get_or_compute
 from .forms import JoinForm, NewsCommentForm
-from django.db.models import F
-
-# Импорты для API (только если установлен rest_framework)
-try:
-    from rest_framework.decorators import api_view
-    from rest_framework.response import Response
+from .pagination import COMMENTS_PER_PAGE, PHOTOS_PER_PAGE, keyset_page, paginate
+from .ratelimit import is_rate_limited
+from .roster import get_roster, players_page_etag
+from .seasons import get_season_json
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
 
-    REST_FRAMEWORK_AVAILABLE = True
-except ImportError:
-    REST_FRAMEWORK_AVAILABLE = False
+LEADERBOARD_TITLES = [
+    ('points', 'Очки'),
+    ('aces', 'Эйсы'),
+    ('blocks', 'Блоки'),
+    ('receptions', 'Приёмы'),
+]
 
 
 def home(request):
-    latest_news = News.objects.all()[:3]
+    latest_news = News.objects.defer('content')[:3]
     return render(request, 'team/home.html', {'latest_news': latest_news})
 
 
+@condition(etag_func=players_page_etag)
 def players(request):
-    # Безопасное кэширование с проверкой доступности
-    try:
-        cache_key = 'players_list'
-        players_list = cache.get(cache_key)
-
-        if not players_list:
-            players_list = Player.objects.all()
-            cache.set(cache_key, players_list, 60 * 60)  # 1 час
-    except Exception:
-        # Если кэширование не работает, используем обычный запрос
-        players_list = Player.objects.all()
-
-    return render(request, 'team/players.html', {'players': players_list})
+    # Состав по амплуа из кэша; браузер с тем же ETag получает 304 без рендера
+    return render(request, 'team/players.html', {'roster': get_roster()})
 
 
 def matches(request):
@@ -46,27 +42,30 @@ def matches(request):
 
 
 def news_list(request):
-    news_list = News.objects.all()
-    paginator = Paginator(news_list, 5)  # 5 новостей на страницу
-
-    page = request.GET.get('page')
-    try:
-        news = paginator.page(page)
-    except PageNotAnInteger:
-        news = paginator.page(1)
-    except EmptyPage:
-        news = paginator.page(paginator.num_pages)
+    # Списку хватает анонса — полный текст (content) из БД не читаем
+    news_list = News.objects.defer('content')
+    news = paginate(request, news_list, 5, 'news', ('-created_at', '-id'))  # 5 новостей на страницу
 
     return render(request, 'team/news_list.html', {'news': news})
 
 
 def news_detail(request, slug):
     news_item = get_object_or_404(News, slug=slug)
-    comments = news_item.comments.filter(is_approved=True)
-
+    # Комментарии порциями по keyset-курсору: страница не растёт вместе с обсуждением
+    comments, next_cursor = keyset_page(
+        news_item.comments.filter(is_approved=True),
+        ('created_at', 'id'),
+        cursor=request.GET.get('comments_after'),
+        limit=COMMENTS_PER_PAGE,
+    )
+
+    status = 200
     if request.method == 'POST':
         form = NewsCommentForm(request.POST)
-        if form.is_valid():
+        if is_rate_limited(request, 'comment'):
+            form.add_error(None, 'Слишком много комментариев подряд. Попробуйте чуть позже.')
+            status = 429
+        elif form.is_valid():
             comment = form.save(commit=False)
             comment.news = news_item
             comment.save()
@@ -77,21 +76,14 @@ def news_detail(request, slug):
     return render(request, 'team/news_detail.html', {
         'news': news_item,
         'comments': comments,
+        'next_cursor': next_cursor,
         'form': form
-    })
+    }, status=status)
 
 
 def gallery(request):
     albums_list = Album.objects.all()
-    paginator = Paginator(albums_list, 6)  # 6 альбомов на страницу
-
-    page = request.GET.get('page')
-    try:
-        albums = paginator.page(page)
-    except PageNotAnInteger:
-        albums = paginator.page(1)
-    except EmptyPage:
-        albums = paginator.page(paginator.num_pages)
+    albums = paginate(request, albums_list, 6, 'gallery', ('-created_at', '-id'))  # 6 альбомов на страницу
 
     return render(request, 'team/gallery.html', {'albums': albums})
 
@@ -99,16 +91,7 @@ def gallery(request):
 def album_detail(request, album_id):
     album = get_object_or_404(Album, id=album_id)
     photos_list = album.photos.all()
-
-    paginator = Paginator(photos_list, 12)  # 12 фото на страницу
-    page = request.GET.get('page')
-
-    try:
-        photos = paginator.page(page)
-    except PageNotAnInteger:
-        photos = paginator.page(1)
-    except EmptyPage:
-        photos = paginator.page(paginator.num_pages)
+    photos = paginate(request, photos_list, PHOTOS_PER_PAGE, 'gallery', ('-uploaded_at', '-id'))
 
     return render(request, 'team/album_detail.html', {
         'album': album,
@@ -117,7 +100,7 @@ def album_detail(request, album_id):
 
 
 def our_results(request):
-    season = Season.objects.filter(is_active=True).first()
+    season = Season.get_active()
     if not season:
         return render(request, 'team/our_results.html', {
             'error': 'Активный сезон не задан в админке.'
@@ -132,130 +115,75 @@ def our_results(request):
         total_sets__gt=0  # Только сыгранные матчи
     ).select_related('opponent').order_by('-date')
 
-    # Исправленный расчет статистики:
-    stats = {
-        'played': matches.count(),
-        'wins': matches.filter(sets_home__gt=F('sets_away')).count(),
-        'losses': matches.filter(sets_home__lt=F('sets_away')).count(),
-        'sets_won': sum(m.sets_home for m in matches),
-        'sets_lost': sum(m.sets_away for m in matches),
-        'points': sum(m.points for m in matches),
-    }
-
     # === Турнирная таблица ===
     standings = LeagueStanding.objects.filter(season=season).order_by('position')
 
-    # Найдём позицию «ИСКРА»
-    iskra_standing = None
-    for item in standings:
-        if 'ИСКРА' in item.team_name.upper():
-            iskra_standing = item
-            break
+    # Сводка и место «ИСКРА» кэшируются вместе с фрагментами таблиц: на попадании
+    # страница не делает ни одного запроса к матчам и таблице
+    summary = get_or_compute('results', f'summary:{season.id}', lambda: _results_summary(matches, standings))
 
     return render(request, 'team/our_results.html', {
         'season': season,
-        'stats': stats,
+        'stats': summary['stats'],
         'matches': matches,
         'standings': standings,
-        'iskra_standing': iskra_standing,
+        'iskra_standing': summary['iskra_standing'],
     })
 
 
-def calculate_standings(season):
-    """Вспомогательная функция для расчета турнирной таблицы"""
-    matches = Match.objects.filter(season=season)
-    teams = {}
-
-    teams['ИСКРА'] = {'played': 0, 'wins': 0, 'losses': 0, 'sets_won': 0, 'sets_lost': 0, 'points': 0}
-
-    for opponent in Opponent.objects.all():
-        teams[opponent.name] = {
-            'played': 0, 'wins': 0, 'losses': 0,
-            'sets_won': 0, 'sets_lost': 0, 'points': 0
-        }
-
-    for match in matches:
-        opp_name = match.opponent.name
-
-        teams['ИСКРА']['played'] += 1
-        teams['ИСКРА']['sets_won'] += match.sets_home
-        teams['ИСКРА']['sets_lost'] += match.sets_away
-        teams['ИСКРА']['points'] += match.points
+def _results_summary(matches, standings):
+    """Итоги сыгранных матчей одним агрегатом и строка «ИСКРА» в таблице"""
+    stats = matches.aggregate(
+        played=Count('id'),
+        wins=Count('id', filter=Q(sets_home__gt=F('sets_away'))),
+        losses=Count('id', filter=Q(sets_home__lt=F('sets_away'))),
+        sets_won=Coalesce(Sum('sets_home'), 0),
+        sets_lost=Coalesce(Sum('sets_away'), 0),
+        points=Coalesce(Sum('points'), 0),
+    )
+    # Найдём позицию «ИСКРА» (upper() в Python: LIKE в SQLite не сворачивает регистр кириллицы)
+    iskra_standing = None
+    for item in standings.values('team_name', 'position', 'points'):
+        if 'ИСКРА' in item['team_name'].upper():
+            iskra_standing = item
+            break
+    return {'stats': stats, 'iskra_standing': iskra_standing}
 
-        teams[opp_name]['played'] += 1
-        teams[opp_name]['sets_won'] += match.sets_away
-        teams[opp_name]['sets_lost'] += match.sets_home
-        teams[opp_name]['points'] += (3 - match.points)
 
-        if match.is_win:
-            teams['ИСКРА']['wins'] += 1
-            teams[opp_name]['losses'] += 1
-        else:
-            teams['ИСКРА']['losses'] += 1
-            teams[opp_name]['wins'] += 1
+def season_archive(request, season_id):
+    # Завершённый сезон — один запрос к архиву, без пересчёта из матчей
+    raw = get_season_json(season_id)
+    if raw is None:
+        raise Http404('Сезон не найден')
+    data = json.loads(raw)
+    for match in data['matches']:
+        match['date'] = parse_datetime(match['date'])
+    data['leaderboards'] = [
+        {'title': title, 'rows': [{**row, 'value': row[stat]} for row in data['leaders'][stat]]}
+        for stat, title in LEADERBOARD_TITLES
+    ]
 
-    return sorted(teams.items(), key=lambda x: x[1]['points'], reverse=True)
+    return render(request, 'team/season_archive.html', data)
 
 
 def join_team(request):
+    status = 200
     if request.method == 'POST':
         form = JoinForm(request.POST)
-        if form.is_valid():
-            form.save()
-            # Отправка email тренеру
-            try:
-                send_mail(
-                    subject='Новая заявка в «ИСКРА»',
-                    message=f"Имя: {form.cleaned_data['name']}\nТелефон: {form.cleaned_data['phone']}",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=['coach@iskra-volleyball.ru'],
-                    fail_silently=True,
-                )
-            except Exception:
-                # Продолжаем даже если email не отправился
-                pass
+        if is_rate_limited(request, 'join'):
+            form.add_error(None, 'Слишком много заявок с вашего адреса. Попробуйте позже.')
+            status = 429
+        elif form.is_valid():
+            # Тренер узнает о заявке из сводки (send_application_digest), а не из письма на каждую
+            submit_application(form)
             return render(request, 'team/join_success.html')
     else:
         form = JoinForm()
-    return render(request, 'team/join.html', {'form': form})
-
-
-# API функции (только если rest_framework доступен)
-if REST_FRAMEWORK_AVAILABLE:
-    @api_view(['GET'])
-    def api_home(request):
-        return Response({
-            'message': 'Добро пожаловать в API ВК «ИСКРА»',
-            'endpoints': {
-                'players': '/api/players/',
-                'matches': '/api/matches/',
-                'news': '/api/news/',
-                'albums': '/api/albums/',
-                'current_season': '/api/current-season/',
-            }
-        })
-
-
-    @api_view(['GET'])
-    def current_season(request):
-        from .serializers import SeasonSerializer
-        season = Season.objects.filter(is_active=True).first()
-        if season:
-            serializer = SeasonSerializer(season)
-            return Response(serializer.data)
-        return Response({'error': 'Активный сезон не найден'})
-else:
-    # Заглушки если REST Framework не установлен
-    def api_home(request):
-        return render(request, 'team/api_unavailable.html')
-
-
-    def current_season(request):
-        return render(request, 'team/api_unavailable.html')
+    return render(request, 'team/join.html', {'form': form}, status=status)
 
 
 def league_table(request):
-    season = Season.objects.filter(is_active=True).first()
+    season = Season.get_active()
     if not season:
         return render(request, 'team/league_table.html', {'error': 'Сезон не задан'})
 
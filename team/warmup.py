@@ -0,0 +1,74 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+# Шаблоны публичных страниц: после get_template() они лежат в кэше
+# загрузчика (django.template.loaders.cached) этого процесса
+WARM_TEMPLATES = [
+    'team/base.html',
+    'team/home.html',
+    'team/players.html',
+    'team/matches.html',
+    'team/news_list.html',
+    'team/news_detail.html',
+    'team/gallery.html',
+    'team/album_detail.html',
+    'team/our_results.html',
+    'team/join.html',
+]
+
+
+def _warm_urls():
+    # Первый reverse() заполняет словари резолвера, включая ленивый API
+    reverse('home')
+
+
+def _warm_templates():
+    for name in WARM_TEMPLATES:
+        get_template(name)
+
+
+def _warm_db():
+    # В режиме пула здесь же создаётся пул воркера (min_size соединений)
+    connections['default'].ensure_connection()
+
+
+def _warm_db_ping():
+    # Круг до базы уже по открытому соединению — видно, сколько из шага db ушло на само подключение
+    with connections['default'].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def _warm_season():
+    from .models import Season
+    Season.get_active()
+
+
+def warm_up(connect=True):
+    """Прогревает процесс до первого запроса; возвращает время шагов в мс.
+
+    connect=False — для master-процесса gunicorn: соединение с БД
+    нельзя открывать до fork, его откроет каждый воркер сам.
+    """
+    steps = [('urls', _warm_urls), ('templates', _warm_templates)]
+    if connect:
+        steps += [('db', _warm_db), ('db_ping', _warm_db_ping), ('season', _warm_season)]
+
+    timings = {}
+    for name, func in steps:
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            logger.exception('Прогрев: шаг %s не выполнен', name)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    logger.info('Прогрев завершён (DB_POOL=%s): %s', settings.DB_POOL, timings)
+    return timings